@@ -4,6 +4,7 @@ Provides dashboard for educators to monitor and intervene
 """
 
 from flask import Flask, render_template, request, jsonify, redirect, url_for, send_file, flash, session, current_app
+from flask.json.provider import DefaultJSONProvider
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 import pandas as pd
 import os
@@ -30,7 +31,7 @@ print(f"Environment file in project root: {os.path.exists(os.path.join(project_r
 from models.risk_predictor import StudentRiskPredictor
 from agents.intervention_agent import InterventionAgent
 from services.notification_service import get_notification_service
-from services.ai_suggestions import AISuggestionEngine, get_top_features
+from services.ai_suggestions import get_engine, get_top_features
 from services.report_generator import ReportGenerator
 from services.sentiment_analysis import sentiment_analyzer, analyze_text_sentiment
 from services.chatbot_service import process_student_message
@@ -39,6 +40,11 @@ from models.database import db, init_db, StudentFeedback, ChatConversation, Chat
 from services.auth_service import role_required, admin_required, faculty_required, student_required, faculty_or_admin_required, get_user_dashboard_route, can_access_student_data, get_faculty_students, create_user
 from sqlalchemy import case, desc
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; Flask's stdlib json provider is used otherwise
+    orjson = None
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///student_support.db'
@@ -48,6 +54,25 @@ app.config['TEMPLATES_AUTO_RELOAD'] = True
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 app.jinja_env.auto_reload = True
 
+
+class OrJSONProvider(DefaultJSONProvider):
+    """Serialize jsonify() responses with orjson (keeps Flask's key order and date format)"""
+    
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+if orjson is not None:
+    app.json = OrJSONProvider(app)
+
 # Initialize Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -77,7 +102,7 @@ print(f"Debug - Mongo enabled: {mongo_enabled}")
 # Initialize models and services
 predictor = StudentRiskPredictor()
 intervention_agent = InterventionAgent()
-ai_engine = AISuggestionEngine()
+ai_engine = get_engine()
 report_generator = ReportGenerator()
 notification_service = get_notification_service()
 
@@ -990,9 +1015,10 @@ def send_bulk_alerts():
     
     high_risk_students = students_data[students_data['RiskLevel'] == 'High Risk']
     
-    results = []
-    for _, student in high_risk_students.iterrows():
-        student_data = {
+    # to_dict boxes numpy scalars into plain Python values, so the records
+    # can also be queued for a Celery worker as JSON
+    records = [
+        {
             'student_id': student['StudentID'],
             'name': student['Name'],
             'attendance': student['Attendance'],
@@ -1000,27 +1026,28 @@ def send_bulk_alerts():
             'engagement_score': student['EngagementScore'],
             'assignments_submitted': student['AssignmentsSubmitted'],
             'total_assignments': student['TotalAssignments'],
-            'risk_level': student['RiskLevel']
-        }
-        
-        parent_contact = {
-            'email': student.get('ParentEmail', 'parent@example.com'),
-            'phone': student.get('ParentPhone', '+1234567890')
+            'risk_level': student['RiskLevel'],
+            'parent_contact': {
+                'email': student.get('ParentEmail', 'parent@example.com'),
+                'phone': student.get('ParentPhone', '+1234567890')
+            }
         }
-        
-        success = notification_service.send_high_risk_alert(student_data, parent_contact, 'email')
-        results.append({'student': student['Name'], 'success': success})
-        # Mirror each attempt
-        if app.config.get('MONGO_ENABLED'):
+        for student in high_risk_students.to_dict('records')
+    ]
+    
+    results = notification_service.send_bulk_alerts(records)
+    # Mirror each attempt
+    if app.config.get('MONGO_ENABLED'):
+        for student_data, result in zip(records, results):
             try:
                 alert_doc = {
                     'student_id': student_data['student_id'],
                     'name': student_data['name'],
                     'alert_type': 'bulk_high_risk',
                     'risk_level': student_data.get('risk_level'),
-                    'status': 'sent' if success else 'failed',
+                    'status': 'sent' if result['success'] else 'failed',
                     'source': 'send_bulk_alerts',
-                    'parent_contact': parent_contact,
+                    'parent_contact': student_data['parent_contact'],
                     'created_at': datetime.utcnow().isoformat()
                 }
                 insert_alert(alert_doc)
@@ -1167,6 +1194,7 @@ def debug_users():
     for user in users:
         result += f"""
         <div style="border: 1px solid #ccc; margin: 10px; padding: 10px;">
+            <strong>User ID:</strong> {user.id}<br>
             <strong>Username:</strong> {user.username}<br>
             <strong>Role:</strong> {user.role}<br>
             <strong>Name:</strong> {user.first_name} {user.last_name}<br>
@@ -1382,6 +1410,8 @@ def chat_endpoint():
         
         # Update conversation stats
         conversation.message_count += 2
+        # Assigned as a SQL expression so the average is computed by the UPDATE itself
+        conversation.avg_sentiment = ChatConversation.avg_sentiment_live.expression
         conversation.risk_level = chat_response['sentiment_analysis']['risk_level']
         conversation.needs_human_review = chat_response['needs_human_intervention']
         
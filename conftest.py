@@ -0,0 +1,47 @@
+"""
+Pytest fixtures shared by the test_*.py scripts
+"""
+
+import pytest
+
+from http_client import login, make_session, wait_for_server
+
+
+@pytest.fixture(scope="session", autouse=True)
+def server():
+    """Skip the run unless the app is serving on localhost:5000; every test talks to it"""
+    if not wait_for_server():
+        pytest.skip("the app is not running on localhost:5000")
+
+
+@pytest.fixture(scope="session")
+def _pooled_session():
+    """One pooled session for the whole test run, so requests skip the TCP handshake"""
+    session = make_session()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def http(_pooled_session):
+    """The shared session with its cookies cleared, since /login skips users already signed in"""
+    _pooled_session.cookies.clear()
+    return _pooled_session
+
+
+@pytest.fixture(scope="session")
+def faculty_session():
+    """Session signed in as faculty F001 once for the whole run"""
+    return login('F001', 'F001', 'faculty')
+
+
+@pytest.fixture(scope="session")
+def student_session():
+    """Session signed in as student S001 once for the whole run"""
+    return login('S001', 'S001', 'student')
+
+
+@pytest.fixture(scope="session")
+def admin_session():
+    """Session signed in as the administrator once for the whole run"""
+    return login('admin', 'admin@123', 'administrator')
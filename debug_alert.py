@@ -44,8 +44,8 @@ print(f"Minimal response content: {minimal_response.text}")
 # Check the notification log
 print("\n=== Checking Notification Log ===")
 try:
-    with open('data/notification_log.json', 'r') as f:
-        log_data = json.load(f)
+    with open('data/notification_log.jsonl', 'r') as f:
+        log_data = [json.loads(line) for line in f if line.strip()]
         print(f"Found {len(log_data)} notifications in log")
         for entry in log_data[-3:]:  # Show last 3 entries
             print(f"  - {entry['timestamp']}: {entry['alert_type']} alert to {entry['student_name']} ({entry['student_id']})")
@@ -1,11 +1,30 @@
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 # Test the chat functionality with proper authentication
 base_url = "http://localhost:5000"
 
-# Create a session to maintain cookies
+# Create a session to maintain cookies, with a pool sized for concurrent requests
 session = requests.Session()
+session.mount('http://', HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0))
+session.headers['Connection'] = 'keep-alive'
+
+
+def run_concurrent(n, message='I am feeling stressed about my exams.'):
+    """Send n chat requests in parallel over the shared, logged-in session"""
+    def send(i):
+        chat_data = {
+            'student_id': 'S001',
+            'message': message,
+            'session_id': f'test_session_concurrent_{i:03d}'
+        }
+        return session.post(f"{base_url}/chat", json=chat_data).status_code
+
+    with ThreadPoolExecutor(max_workers=min(n, 16)) as executor:
+        return list(executor.map(send, range(n)))
+
 
 # First, login
 print("Logging in...")
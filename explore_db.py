@@ -4,16 +4,17 @@ Script to explore the database structure
 """
 
 import sqlite3
-import os
 
 def explore_database():
     # Connect to the database
     db_path = 'instance/student_support.db'
-    if not os.path.exists(db_path):
+    try:
+        # mode=rw fails instead of silently creating an empty database
+        conn = sqlite3.connect(f"file:{db_path}?mode=rw", uri=True)
+    except sqlite3.OperationalError:
         print(f"Database not found at {db_path}")
         return
     
-    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     # Get list of tables
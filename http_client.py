@@ -0,0 +1,51 @@
+"""
+Shared HTTP session for the test scripts that talk to the local server
+"""
+
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "http://localhost:5000"
+
+
+def make_session():
+    """Create a session whose pooled keep-alive connections are reused across requests"""
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=0))
+    return session
+
+
+def wait_for_server(timeout=5.0):
+    """Poll /login with exponential backoff until the server answers or `timeout` seconds pass"""
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while True:
+        try:
+            requests.get(f"{BASE_URL}/login", timeout=1)
+            return True
+        except requests.exceptions.ConnectionError:
+            if time.monotonic() + delay > deadline:
+                return False
+            time.sleep(delay)
+            delay *= 2
+
+
+# Signed-in sessions for direct script runs, keyed by (username, role)
+_login_cache = {}
+
+
+def login(username, password, role):
+    """Return a session signed in as the given user, posting to /login only once per user"""
+    key = (username, role)
+    session = _login_cache.get(key)
+    if session is None:
+        session = make_session()
+        response = session.post(f"{BASE_URL}/login",
+                                data={'username': username, 'password': password, 'role': role})
+        # A rejected login re-renders the form instead of redirecting to a dashboard
+        if response.status_code != 200 or response.url.endswith('/login'):
+            raise RuntimeError(f"Login failed for {username} ({role}): HTTP {response.status_code}")
+        _login_cache[key] = session
+    return session
@@ -4,13 +4,33 @@ Database Models for Student Feedback, Chat, Sentiment Data, and User Authenticat
 
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 import json
-import bcrypt
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib json module is used otherwise
+    orjson = None
 
 db = SQLAlchemy()
 
 
+def _iso(value):
+    """Serialize an optional date/datetime to ISO-8601 for to_dict()"""
+    return None if value is None else value.isoformat()
+
+
+def _json_dumps(obj):
+    """Encode a JSON text column value, with orjson when it is installed"""
+    return orjson.dumps(obj).decode() if orjson is not None else json.dumps(obj)
+
+
+def _json_loads(text):
+    """Decode a JSON text column value, with orjson when it is installed"""
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
 class User(UserMixin, db.Model):
     """User model for authentication with role-based access"""
     __tablename__ = 'users'
@@ -43,12 +63,14 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         """Hash and set password"""
+        import bcrypt  # deferred: only needed when handling credentials
         password_bytes = password.encode('utf-8')
         salt = bcrypt.gensalt()
         self.password_hash = bcrypt.hashpw(password_bytes, salt).decode('utf-8')
     
     def check_password(self, password):
         """Check if provided password matches hash"""
+        import bcrypt
         password_bytes = password.encode('utf-8')
         hash_bytes = self.password_hash.encode('utf-8')
         return bcrypt.checkpw(password_bytes, hash_bytes)
@@ -83,14 +105,18 @@ class User(UserMixin, db.Model):
             'faculty_id': self.faculty_id,
             'department': self.department,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'last_login': self.last_login.isoformat() if self.last_login else None
+            'created_at': _iso(self.created_at),
+            'last_login': _iso(self.last_login)
         }
 
 
 class FacultyStudent(db.Model):
     """Association table for faculty-student relationships"""
     __tablename__ = 'faculty_students'
+    __table_args__ = (
+        # Covers the can_access_student_data lookup on the auth path
+        db.Index('ix_faculty_student_active', 'faculty_id', 'student_id', 'is_active'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     faculty_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -131,17 +157,17 @@ class StudentFeedback(db.Model):
             'student_id': self.student_id,
             'feedback_text': self.feedback_text,
             'feedback_type': self.feedback_type,
-            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
-            'sentiment_data': json.loads(self.sentiment_data) if self.sentiment_data else {},
+            'timestamp': _iso(self.timestamp),
+            'sentiment_data': _json_loads(self.sentiment_data) if self.sentiment_data else {},
             'risk_level': self.risk_level,
             'needs_attention': self.needs_attention,
             'counselor_notified': self.counselor_notified,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': _iso(self.created_at)
         }
     
     def set_sentiment_data(self, sentiment_dict):
         """Store sentiment analysis results"""
-        self.sentiment_data = json.dumps(sentiment_dict)
+        self.sentiment_data = _json_dumps(sentiment_dict)
         self.risk_level = sentiment_dict.get('risk_level', 'low')
         self.needs_attention = sentiment_dict.get('needs_attention', False)
 
@@ -174,8 +200,8 @@ class ChatConversation(db.Model):
             'id': self.id,
             'student_id': self.student_id,
             'session_id': self.session_id,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'ended_at': self.ended_at.isoformat() if self.ended_at else None,
+            'started_at': _iso(self.started_at),
+            'ended_at': _iso(self.ended_at),
             'message_count': self.message_count,
             'avg_sentiment': self.avg_sentiment,
             'risk_level': self.risk_level,
@@ -211,23 +237,39 @@ class ChatMessage(db.Model):
             'conversation_id': self.conversation_id,
             'message_type': self.message_type,
             'message_text': self.message_text,
-            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
-            'sentiment_data': json.loads(self.sentiment_data) if self.sentiment_data else {},
+            'timestamp': _iso(self.timestamp),
+            'sentiment_data': _json_loads(self.sentiment_data) if self.sentiment_data else {},
             'risk_level': self.risk_level,
             'response_type': self.response_type,
-            'resources_provided': json.loads(self.resources_provided) if self.resources_provided else []
+            'resources_provided': _json_loads(self.resources_provided) if self.resources_provided else []
         }
     
     def set_sentiment_data(self, sentiment_dict):
         """Store sentiment analysis results"""
         if sentiment_dict:
-            self.sentiment_data = json.dumps(sentiment_dict)
+            self.sentiment_data = _json_dumps(sentiment_dict)
             self.risk_level = sentiment_dict.get('risk_level', 'low')
     
     def set_resources(self, resources_list):
         """Store resources provided"""
         if resources_list:
-            self.resources_provided = json.dumps(resources_list)
+            self.resources_provided = _json_dumps(resources_list)
+
+
+# Conversation-level average computed in the database rather than by loading
+# messages into Python. Only student messages carry sentiment_data, and AVG()
+# skips the NULLs produced for bot messages.
+ChatConversation.avg_sentiment_live = db.column_property(
+    db.select(
+        db.func.avg(
+            db.func.json_extract(ChatMessage.sentiment_data, '$.sentiment_scores.vader_compound')
+        )
+    )
+    .where(ChatMessage.conversation_id == ChatConversation.id)
+    .correlate_except(ChatMessage)
+    .scalar_subquery(),
+    deferred=True
+)
 
 
 class SentimentAlert(db.Model):
@@ -270,10 +312,10 @@ class SentimentAlert(db.Model):
             'risk_level': self.risk_level,
             'alert_message': self.alert_message,
             'sentiment_score': self.sentiment_score,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'acknowledged_at': self.acknowledged_at.isoformat() if self.acknowledged_at else None,
+            'created_at': _iso(self.created_at),
+            'acknowledged_at': _iso(self.acknowledged_at),
             'acknowledged_by': self.acknowledged_by,
-            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
+            'resolved_at': _iso(self.resolved_at),
             'status': self.status,
             'counselor_contacted': self.counselor_contacted,
             'parent_notified': self.parent_notified,
@@ -284,6 +326,11 @@ class SentimentAlert(db.Model):
 class StudentSentimentTrend(db.Model):
     """Model for tracking sentiment trends over time"""
     __tablename__ = 'sentiment_trends'
+    __table_args__ = (
+        # A unique index rather than a table constraint, so init_db also adds
+        # it to databases created before it was declared
+        db.Index('uq_trend_student_date', 'student_id', 'date', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.String(50), nullable=False, index=True)
@@ -311,7 +358,7 @@ class StudentSentimentTrend(db.Model):
         return {
             'id': self.id,
             'student_id': self.student_id,
-            'date': self.date.isoformat() if self.date else None,
+            'date': _iso(self.date),
             'avg_sentiment': self.avg_sentiment,
             'message_count': self.message_count,
             'high_risk_count': self.high_risk_count,
@@ -328,6 +375,15 @@ def init_db(app):
     
     with app.app_context():
         db.create_all()
+        # create_all skips existing tables, so add indexes declared since then
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(bind=db.engine, checkfirst=True)
+                except IntegrityError as e:
+                    # Rows that already break a unique index are left for an
+                    # operator to resolve; the app still starts without it
+                    print(f"Could not create unique index {index.name}: {e.orig}")
         print("Database tables created successfully")
 
 
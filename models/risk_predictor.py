@@ -6,74 +6,100 @@ Uses ML to predict which students are at risk of academic failure
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
+from sklearn.tree import DecisionTreeClassifier
 import joblib
+import pickle
 import os
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; inference falls back to scikit-learn
+    njit = None
+
+
+def _walk_trees(X, feature, threshold, left, right, value, roots):
+    """Average leaf class probabilities over every flattened tree for each row"""
+    out = np.zeros((X.shape[0], value.shape[1]))
+    for i in range(X.shape[0]):
+        for root in roots:
+            node = root
+            while left[node] != -1:
+                if X[i, feature[node]] <= threshold[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+            out[i] += value[node]
+    return out / roots.shape[0]
+
+
+if njit is not None:
+    _walk_trees = njit(cache=True)(_walk_trees)
+
 
 class StudentRiskPredictor:
     def __init__(self):
         self.model = None
-        self.label_encoder = LabelEncoder()
+        self._X = None  # feature matrix from the last training run
+        self.onnx_session = None  # optional onnxruntime session used for inference
+        self._tree_arrays = None  # flattened trees for the numba walker
+        self.classes_ = np.array(['Critical Risk', 'High Risk', 'Medium Risk', 'Safe'])
+        self._classes = tuple(self.classes_.tolist())  # plain-str labels for the hot path
         self.feature_columns = ['Attendance', 'AverageScore', 'AssignmentsSubmitted', 
                                 'TotalAssignments', 'EngagementScore']
         
     def prepare_data(self, df):
         """Prepare and clean the data"""
-        # Calculate assignment completion rate
-        df['AssignmentCompletionRate'] = (df['AssignmentsSubmitted'] / df['TotalAssignments']) * 100
+        # Calculate assignment completion rate (0 when no assignments were set)
+        submitted = df['AssignmentsSubmitted'].to_numpy(dtype=np.float64)
+        total = df['TotalAssignments'].to_numpy(dtype=np.float64)
+        df['AssignmentCompletionRate'] = np.divide(
+            submitted, total, out=np.zeros_like(submitted), where=total != 0
+        ) * 100
         
         # Encode previous grades
         grade_mapping = {'A': 4, 'B': 3, 'C': 2, 'D': 1, 'F': 0}
         df['PreviousGradeNumeric'] = df['PreviousGrade'].map(grade_mapping)
         
-        # Define risk level based on multiple factors
-        df['RiskLevel'] = df.apply(self._calculate_risk, axis=1)
+        # Define risk level (classification based on attendance requirements)
+        attendance = df['Attendance'].to_numpy()
+        df['RiskLevel'] = np.select(
+            [attendance >= 75, attendance >= 70, attendance >= 60],
+            ['Safe', 'Medium Risk', 'High Risk'],
+            default='Critical Risk'
+        )
         
         return df
     
-    def _calculate_risk(self, row):
-        """Calculate risk level based on student metrics"""
-        # New risk categorization based on attendance requirements
-        attendance = row['Attendance']
-        
-        # Primary classification based on attendance
-        if attendance >= 75:
-            return 'Safe'
-        elif attendance >= 70:
-            return 'Medium Risk'
-        elif attendance >= 60:
-            return 'High Risk'
-        else:
-            return 'Critical Risk'
-    
     def train_model(self, data_path):
         """Train the risk prediction model"""
         # Load data
         df = pd.read_csv(data_path)
         df = self.prepare_data(df)
         
-        # Prepare features
-        X = df[self.feature_columns]
+        # Prepare features once as a C-contiguous float32 matrix (the tree's
+        # internal layout); to_numpy alone yields a column-major array here
+        self._X = X = np.ascontiguousarray(df[self.feature_columns].to_numpy(dtype=np.float32))
         y = df['RiskLevel']
         
         # Encode labels
-        y_encoded = self.label_encoder.fit_transform(y)
+        self.classes_, y_encoded = np.unique(y.to_numpy(), return_inverse=True)
+        self._classes = tuple(self.classes_.tolist())
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
             X, y_encoded, test_size=0.2, random_state=42
         )
         
-        # Train Random Forest model
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
+        # Train a single shallow decision tree: the labels are thresholds on
+        # attendance, so a 100-tree forest only adds inference cost
+        self.model = DecisionTreeClassifier(
+            max_depth=3,
             random_state=42,
             class_weight='balanced'
         )
         self.model.fit(X_train, y_train)
+        self.onnx_session = None  # any loaded ONNX export is now stale
+        self._flatten_trees()
         
         # Calculate accuracy
         accuracy = self.model.score(X_test, y_test)
@@ -83,51 +109,118 @@ class StudentRiskPredictor:
     
     def predict_risk(self, student_data):
         """Predict risk level for a student"""
+        return self.predict_risk_batch([student_data])[0]
+    
+    def predict_risk_batch(self, students):
+        """Predict risk levels for many students with a single model call"""
         if self.model is None:
             raise ValueError("Model not trained yet!")
         
-        # Prepare features
-        features = [[
+        # Prepare features, one row per student
+        features = np.asarray([[
             student_data['Attendance'],
             student_data['AverageScore'],
             student_data['AssignmentsSubmitted'],
             student_data['TotalAssignments'],
             student_data['EngagementScore']
-        ]]
+        ] for student_data in students], dtype=np.float32).reshape(-1, len(self.feature_columns))
         
-        # Predict
-        prediction = self.model.predict(features)[0]
-        probabilities = self.model.predict_proba(features)[0]
-        
-        risk_level = self.label_encoder.inverse_transform([prediction])[0]
-        confidence = max(probabilities) * 100
+        # Predict (predict() is just the argmax of predict_proba)
+        if self._tree_arrays is not None:
+            all_probabilities = _walk_trees(features, *self._tree_arrays)
+        elif self.onnx_session is not None:
+            all_probabilities = self.onnx_session.run(
+                ['probabilities'], {'input': features}
+            )[0].astype(np.float64)
+        else:
+            all_probabilities = self.model.predict_proba(features)
+        predictions = self.model.classes_.take(all_probabilities.argmax(axis=1)).tolist()
+        classes = self._classes
         
-        return {
-            'risk_level': risk_level,
-            'confidence': confidence,
-            'probabilities': {
-                label: prob * 100 
-                for label, prob in zip(self.label_encoder.classes_, probabilities)
+        return [
+            {
+                'risk_level': classes[prediction],
+                'confidence': max(probabilities) * 100,
+                'probabilities': {
+                    label: prob * 100
+                    for label, prob in zip(classes, probabilities)
+                }
             }
-        }
+            for prediction, probabilities in zip(predictions, all_probabilities)
+        ]
+    
+    def _flatten_trees(self):
+        """Concatenate the fitted tree(s) into flat arrays for the JIT walker"""
+        if njit is None:
+            self._tree_arrays = None
+            return
+        
+        trees = [est.tree_ for est in getattr(self.model, 'estimators_', [self.model])]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        value = np.concatenate([tree.value[:, 0, :] for tree in trees])
+        self._tree_arrays = (
+            np.concatenate([tree.feature for tree in trees]),
+            np.concatenate([tree.threshold for tree in trees]),
+            # Child indices are per tree; shift them into the concatenated arrays
+            np.concatenate([np.where(tree.children_left == -1, -1, tree.children_left + off)
+                            for tree, off in zip(trees, offsets)]),
+            np.concatenate([np.where(tree.children_right == -1, -1, tree.children_right + off)
+                            for tree, off in zip(trees, offsets)]),
+            value / value.sum(axis=1, keepdims=True),
+            offsets[:-1]
+        )
     
     def save_model(self, path='models/saved_model.pkl'):
         """Save the trained model"""
         os.makedirs(os.path.dirname(path), exist_ok=True)
         joblib.dump({
             'model': self.model,
-            'label_encoder': self.label_encoder,
+            'classes': self.classes_,
             'feature_columns': self.feature_columns
-        }, path)
+        }, path, compress=3, protocol=pickle.HIGHEST_PROTOCOL)
         print(f"Model saved to {path}")
+        self._export_onnx(path + '.onnx')
+    
+    def _export_onnx(self, path):
+        """Export the model to ONNX for faster inference (needs skl2onnx)"""
+        try:
+            from skl2onnx import convert_sklearn
+            from skl2onnx.common.data_types import FloatTensorType
+        except ImportError:
+            return
+        
+        initial_type = [('input', FloatTensorType([None, len(self.feature_columns)]))]
+        onx = convert_sklearn(self.model, initial_types=initial_type,
+                              options={id(self.model): {'zipmap': False}})
+        with open(path, 'wb') as f:
+            f.write(onx.SerializeToString())
+        print(f"ONNX model saved to {path}")
     
     def load_model(self, path='models/saved_model.pkl'):
         """Load a trained model"""
         data = joblib.load(path)
         self.model = data['model']
-        self.label_encoder = data['label_encoder']
+        # Models saved before 'classes' was stored carry a fitted LabelEncoder
+        self.classes_ = data['classes'] if 'classes' in data else data['label_encoder'].classes_
+        self._classes = tuple(self.classes_.tolist())
         self.feature_columns = data['feature_columns']
         print(f"Model loaded from {path}")
+        self._flatten_trees()
+        
+        # The numba tree walker is the fastest path; without it, use the ONNX
+        # runtime when an exported model is available. The session is only
+        # built when it will be used, since creating it is slow.
+        self.onnx_session = None
+        onnx_path = path + '.onnx'
+        if self._tree_arrays is None and os.path.exists(onnx_path):
+            try:
+                import onnxruntime
+            except ImportError:
+                return
+            self.onnx_session = onnxruntime.InferenceSession(
+                onnx_path, providers=['CPUExecutionProvider']
+            )
+            print(f"ONNX runtime enabled from {onnx_path}")
 
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@ Quick start script for the Student Risk Prediction System
 
 import os
 import sys
+from importlib.util import find_spec
 
 # Set UTF-8 encoding for Windows console
 if sys.platform == 'win32':
@@ -18,12 +19,9 @@ def check_dependencies():
         'joblib', 'langchain', 'openai'
     ]
     
-    missing = []
-    for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
-            missing.append(package)
+    # find_spec locates packages without executing them (importing pandas
+    # alone takes hundreds of milliseconds)
+    missing = [package for package in required_packages if find_spec(package) is None]
     
     if missing:
         print("[X] Missing required packages:")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Run every test script against the local server, one concurrent group per role
+
+Scripts in a group run one after another in the order listed (they log in
+as the same user and some read what an earlier one wrote to the notification
+log); the admin, faculty and student groups run at the same time.
+"""
+
+import asyncio
+import glob
+import sys
+import time
+
+GROUPS = {
+    'admin': ['test_login.py', 'test_admin_alerts.py', 'test_admin_alerts_comprehensive.py',
+              'test_alert_debug.py', 'test_individual_alert.py'],
+    'faculty': ['test_bulk_report.py', 'test_send_alert.py', 'test_dashboard_features.py'],
+    'student': ['simple_chat_test.py', 'test_chat.py', 'test_chat_working.py',
+                'test_sentiment_comprehensive.py', 'test_sentiment_fix.py',
+                'test_sentiment_direct.py'],
+}
+
+
+async def run_script(script):
+    """Run one script to completion and return (exit code, combined output)"""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, script,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT
+    )
+    output, _ = await process.communicate()
+    return process.returncode, output.decode('utf-8', errors='replace')
+
+
+async def run_group(name, scripts):
+    """Run a group's scripts in order, printing each one's output as it finishes"""
+    results = []
+    for script in scripts:
+        start = time.perf_counter()
+        returncode, output = await run_script(script)
+        # Printed in one piece so concurrent groups don't interleave
+        print(f"\n{'=' * 60}\n[{name}] {script} (exit {returncode}, "
+              f"{time.perf_counter() - start:.1f}s)\n{'=' * 60}\n{output}", flush=True)
+        results.append((script, returncode))
+    return results
+
+
+async def main():
+    grouped = {script for scripts in GROUPS.values() for script in scripts}
+    # New scripts that haven't been put in a group yet run on their own
+    groups = dict(GROUPS)
+    for script in sorted(set(glob.glob('test_*.py')) - grouped):
+        groups[script] = [script]
+
+    start = time.perf_counter()
+    group_results = await asyncio.gather(
+        *(run_group(name, scripts) for name, scripts in groups.items())
+    )
+    results = [result for group in group_results for result in group]
+
+    failed = [script for script, returncode in results if returncode != 0]
+    print(f"\n{'=' * 60}")
+    print(f"Ran {len(results)} scripts in {time.perf_counter() - start:.1f}s")
+    for script in failed:
+        print(f"  ✗ {script} exited with a non-zero status")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -14,8 +14,10 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+from sqlalchemy import func
+
 from app import app
-from models.database import ensure_faculty_assignments, User, FacultyStudent
+from models.database import db, ensure_faculty_assignments, User, FacultyStudent
 
 
 def main():
@@ -25,10 +27,15 @@ def main():
 
         # Report counts per faculty
         faculties = User.query.filter_by(role='faculty', is_active=True).order_by(User.faculty_id).all()
+        counts = dict(
+            db.session.query(FacultyStudent.faculty_id, func.count(FacultyStudent.id))
+            .filter(FacultyStudent.is_active == True)
+            .group_by(FacultyStudent.faculty_id)
+            .all()
+        )
         print("=== Faculty Assignment Counts (active) ===", file=sys.stdout)
         for f in faculties:
-            count = FacultyStudent.query.filter_by(faculty_id=f.id, is_active=True).count()
-            print(f"{f.faculty_id}: {count}", file=sys.stdout)
+            print(f"{f.faculty_id}: {counts.get(f.id, 0)}", file=sys.stdout)
         sys.stdout.flush()
 
 
@@ -2,35 +2,75 @@
 Enhanced AI Suggestion System
 """
 import os
+from functools import cache, lru_cache
 from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+# Parsed once at import; each call only substitutes the student's values
+SUGGESTION_PROMPT = ChatPromptTemplate.from_template("""Analyze student {name}:
+- Risk: {risk}
+- Attendance: {attendance}%
+- Score: {score}%
+- Engagement: {engagement}%
+
+Provide: 1) Assessment 2) Immediate actions 3) Long-term plan""")
+
+# (metric, threshold, suggestions added when the metric is below the threshold)
+RULE_BASED_SUGGESTIONS = (
+    ('Attendance', 60, ("• Schedule parent meeting within 3 days",
+                        "• Identify attendance barriers")),
+    ('AverageScore', 50, ("• Enroll in tutoring program (3x/week)",
+                          "• Create personalized study plan")),
+    ('EngagementScore', 40, ("• One-on-one counseling session",
+                             "• Connect with interests/activities")),
+)
+
+@cache
+def _make_llm(provider, openai_key, google_key):
+    """Build the LLM client once per provider/key combination"""
+    if provider == 'google' and google_key:
+        return ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=google_key)
+    elif openai_key:
+        return ChatOpenAI(model="gpt-3.5-turbo")
+    return None
 
 class AISuggestionEngine:
     def __init__(self):
         # Choose provider: 'openai' (default) or 'google'
-        provider = os.getenv('LLM_PROVIDER', 'openai').lower()
-        openai_key = os.getenv('OPENAI_API_KEY')
-        google_key = os.getenv('GOOGLE_API_KEY')
+        self.llm = _make_llm(
+            os.getenv('LLM_PROVIDER', 'openai').lower(),
+            os.getenv('OPENAI_API_KEY'),
+            os.getenv('GOOGLE_API_KEY')
+        )
         
-        if provider == 'google' and google_key:
-            self.llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=google_key)
-        elif openai_key:
-            self.llm = ChatOpenAI(model="gpt-3.5-turbo")
-        else:
-            self.llm = None
+        self.chain = SUGGESTION_PROMPT | self.llm | StrOutputParser() if self.llm else None
+        # Completions are cached per exact student profile, so repeated views of
+        # an unchanged student reuse the previous suggestions instead of a new LLM call
+        self._llm_call = lru_cache(maxsize=2048)(self._complete)
+    
+    def _complete(self, name, risk, attendance, score, engagement):
+        """Run the LLM chain for one student profile"""
+        return self.chain.invoke({
+            'name': name,
+            'risk': risk,
+            'attendance': attendance,
+            'score': score,
+            'engagement': engagement
+        })
     
     def generate_suggestions(self, student_data, top_factors):
         """Generate AI suggestions"""
-        if self.llm:
+        if self.chain:
             try:
-                prompt = f"""Analyze student {student_data['Name']}:
-- Risk: {student_data.get('RiskLevel')}
-- Attendance: {student_data.get('Attendance')}%
-- Score: {student_data.get('AverageScore')}%
-- Engagement: {student_data.get('EngagementScore')}%
-
-Provide: 1) Assessment 2) Immediate actions 3) Long-term plan"""
-                return self.llm.predict(prompt)
+                return self._llm_call(
+                    student_data['Name'],
+                    student_data.get('RiskLevel'),
+                    student_data.get('Attendance'),
+                    student_data.get('AverageScore'),
+                    student_data.get('EngagementScore')
+                )
             except:
                 pass
         
@@ -38,17 +78,22 @@ Provide: 1) Assessment 2) Immediate actions 3) Long-term plan"""
     
     def _rule_based(self, data):
         """Rule-based suggestions"""
-        suggestions = []
-        if data.get('Attendance', 0) < 60:
-            suggestions.append("• Schedule parent meeting within 3 days")
-            suggestions.append("• Identify attendance barriers")
-        if data.get('AverageScore', 0) < 50:
-            suggestions.append("• Enroll in tutoring program (3x/week)")
-            suggestions.append("• Create personalized study plan")
-        if data.get('EngagementScore', 0) < 40:
-            suggestions.append("• One-on-one counseling session")
-            suggestions.append("• Connect with interests/activities")
-        return "\n".join(suggestions) if suggestions else "Continue monitoring"
+        suggestions = "\n".join(
+            line
+            for metric, threshold, lines in RULE_BASED_SUGGESTIONS
+            if data.get(metric, 0) < threshold
+            for line in lines
+        )
+        return suggestions or "Continue monitoring"
+
+_engine = None
+
+def get_engine():
+    """Get or create the shared suggestion engine instance"""
+    global _engine
+    if _engine is None:
+        _engine = AISuggestionEngine()
+    return _engine
 
 def get_top_features(student_data):
     """Identify top 3 risk factors"""
@@ -60,3 +105,24 @@ def get_top_features(student_data):
     if student_data.get('EngagementScore', 100) < 40:
         factors.append({'name': 'Low Engagement', 'description': f"{student_data.get('EngagementScore')}% - Motivation issue"})
     return factors[:3]
+
+def get_top_features_batch(df):
+    """Identify top 3 risk factors for every student in a DataFrame"""
+    attendance = df['Attendance'].tolist()
+    scores = df['AverageScore'].tolist()
+    engagement = df['EngagementScore'].tolist()
+    low_attendance = (df['Attendance'] < 60).tolist()
+    low_score = (df['AverageScore'] < 50).tolist()
+    low_engagement = (df['EngagementScore'] < 40).tolist()
+    
+    results = []
+    for i in range(len(df)):
+        factors = []
+        if low_attendance[i]:
+            factors.append({'name': 'Low Attendance', 'description': f"{attendance[i]}% - Critical"})
+        if low_score[i]:
+            factors.append({'name': 'Poor Performance', 'description': f"{scores[i]}% - Needs intervention"})
+        if low_engagement[i]:
+            factors.append({'name': 'Low Engagement', 'description': f"{engagement[i]}% - Motivation issue"})
+        results.append(factors)
+    return results
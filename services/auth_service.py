@@ -5,7 +5,8 @@ Authentication Service for Role-Based Access Control
 from functools import wraps
 from flask import redirect, url_for, flash, request, session
 from flask_login import current_user, login_required
-from models.database import User, FacultyStudent
+from sqlalchemy import or_
+from models.database import db, User, FacultyStudent
 
 
 def role_required(*allowed_roles):
@@ -89,30 +90,40 @@ def get_faculty_students(faculty_user):
     if not faculty_user.is_faculty():
         return []
     
-    assignments = FacultyStudent.query.filter_by(
+    rows = db.session.query(FacultyStudent.student_id).filter_by(
         faculty_id=faculty_user.id,
         is_active=True
     ).all()
-    return [assignment.student_id for assignment in assignments]
+    return [row[0] for row in rows]
 
 
 def create_user(username, email, password, role, first_name, last_name, 
                 student_id=None, faculty_id=None, department=None):
     """Create a new user with validation"""
     try:
+        # Look up every potentially conflicting user in a single query
+        conditions = [User.username == username, User.email == email]
+        if role == 'student' and student_id:
+            conditions.append(User.student_id == student_id)
+        elif role == 'faculty' and faculty_id:
+            conditions.append(User.faculty_id == faculty_id)
+        conflicts = User.query.filter(or_(*conditions)).with_entities(
+            User.username, User.email, User.student_id, User.faculty_id
+        ).all()
+        
         # Check if username already exists
-        if User.query.filter_by(username=username).first():
+        if any(c.username == username for c in conflicts):
             return None, "Username already exists"
         
         # Check if email already exists
-        if User.query.filter_by(email=email).first():
+        if any(c.email == email for c in conflicts):
             return None, "Email already exists"
         
         # Role-specific validations and automatic credential setup
         if role == 'student':
             if not student_id:
                 return None, "Student ID is required for students"
-            if User.query.filter_by(student_id=student_id).first():
+            if any(c.student_id == student_id for c in conflicts):
                 return None, "Student ID already exists"
             # For students, use Student ID as both username and password
             username = student_id
@@ -121,7 +132,7 @@ def create_user(username, email, password, role, first_name, last_name,
         elif role == 'faculty':
             if not faculty_id:
                 return None, "Faculty ID is required for faculty"
-            if User.query.filter_by(faculty_id=faculty_id).first():
+            if any(c.faculty_id == faculty_id for c in conflicts):
                 return None, "Faculty ID already exists"
             # For faculty, use Faculty ID as both username and password
             username = faculty_id
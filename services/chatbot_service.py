@@ -5,76 +5,81 @@ Provides emotional support and guidance using LLM integration
 
 import os
 import json
+import logging
+import asyncio
+import threading
+import time
+from collections import Counter, deque
 from datetime import datetime
+from types import MappingProxyType
+import numpy as np
 from typing import Dict, List, Optional, Tuple
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from langchain.memory import ConversationBufferWindowMemory
 from services.sentiment_analysis import sentiment_analyzer
 import re
 
+logger = logging.getLogger(__name__)
 
-class StudentSupportChatbot:
-    """AI-powered chatbot for student emotional support and guidance"""
-    
-    def __init__(self):
-        # Check if OpenAI API key is available
-        self.api_key = os.getenv('OPENAI_API_KEY')
-        print(f"Debug - API Key found: {'Yes' if self.api_key else 'No'}")
-        if self.api_key:
-            print(f"Debug - API Key starts with: {self.api_key[:5]}...")
-            print(f"Debug - API Key length: {len(self.api_key)}")
-            
-        self.use_openai = bool(self.api_key and self.api_key != 'your-api-key-here' and len(self.api_key) > 10)
-        print(f"Debug - Using OpenAI: {self.use_openai}")
-        
-        if self.use_openai:
-            try:
-                print("Debug - Attempting to initialize OpenAI...")
-                self.llm = ChatOpenAI(
-                    model="gpt-3.5-turbo",
-                    temperature=0.7
-                )
-                # Test the API key with a simple request using invoke (predict deprecated)
-                try:
-                    _ = self.llm.invoke("Test")
-                    print("OpenAI chatbot initialized successfully")
-                except Exception as test_error:
-                    print(f"[WARNING] OpenAI API test failed: {test_error}")
-                    print("[WARNING] Continuing with OpenAI disabled. Chatbot will use rule-based responses.")
-                    self.use_openai = False
-                
-                # Conversation memory (keeps last 10 exchanges)
-                if self.use_openai:
-                    self.memory = ConversationBufferWindowMemory(k=10, return_messages=True)
-            except Exception as e:
-                print(f"Failed to initialize OpenAI. Error type: {type(e).__name__}")
-                print(f"Error details: {str(e)}")
-                if hasattr(e, 'response'):
-                    print(f"API Response: {e.response.text}")
-                self.use_openai = False
-        else:
-            print("No valid OpenAI API key found. Using rule-based chatbot.")
-            if not self.api_key:
-                print("Error: OPENAI_API_KEY environment variable is not set")
-            elif self.api_key == 'your-api-key-here':
-                print("Error: Please replace 'your-api-key-here' with your actual OpenAI API key")
-            elif len(self.api_key) <= 10:
-                print(f"Error: API key is too short (length: {len(self.api_key)}). It should be around 51 characters.")
-        
-        # System prompts for different scenarios
-        self.prompts = {
-            'general_support': PromptTemplate(
-                input_variables=["student_message", "sentiment_analysis", "chat_history"],
-                template="""
-You are a compassionate and professional student support counselor AI. Your role is to provide emotional support, guidance, and resources to students who may be struggling.
+# LangChain is imported on first use by _load_langchain(); the rule-based
+# path never needs it
+ChatOpenAI = None
+AIMessage = HumanMessage = SystemMessage = None
+AuthenticationError = None
+
+# Keyword lists for the rule-based fallback
+CRISIS_KEYWORDS = frozenset({'suicide', 'kill myself', 'end it all', 'hurt myself', 'die', 'hopeless'})
+ACADEMIC_KEYWORDS = frozenset({'exam', 'test', 'grade', 'study', 'homework', 'assignment', 'fail', 'stress'})
+EMOTION_KEYWORDS = frozenset({'sad', 'depressed', 'anxious', 'worried', 'scared', 'lonely', 'overwhelmed'})
 
-Current conversation context: {chat_history}
+# Canned replies used when OpenAI is not available
+_CRISIS_REPLY = """I'm very concerned about what you're sharing with me. Your safety and wellbeing are the most important things right now. 
+
+ Please reach out for immediate help:
+ • Crisis Hotline: 988 (Suicide & Crisis Lifeline)
+ • Crisis Text Line: Text HOME to 741741
+ • Emergency: Call 911 if you're in immediate danger
+ 
+ You don't have to go through this alone. There are people who want to help you."""
+
+_ACADEMIC_REPLY = """I understand that academic challenges can feel overwhelming. It's completely normal to feel stressed about your studies.
+
+Here are some strategies that might help:
+• Break large tasks into smaller, manageable steps
+• Create a study schedule and stick to it
+• Take regular breaks to avoid burnout
+• Reach out to your professors during office hours
+• Consider forming study groups with classmates
+• Visit the tutoring center for additional support
+
+Remember, asking for help is a sign of strength, not weakness. What specific academic challenge would you like to talk about?"""
+
+_EMOTION_REPLY = """Thank you for sharing your feelings with me. It takes courage to reach out when you're struggling.
+
+What you're experiencing is valid, and you're not alone in feeling this way. Many students go through similar challenges.
+
+Some things that might help:
+• Practice deep breathing or mindfulness exercises
+• Maintain a regular sleep schedule
+• Stay connected with friends and family
+• Engage in activities you enjoy
+• Consider speaking with a counselor
+
+Would you like to talk more about what's been on your mind? I'm here to listen and support you."""
+
+_DEFAULT_REPLY = """Thank you for reaching out. I'm here to listen and support you through whatever you're going through.
+
+As a student, it's normal to face various challenges - whether they're academic, social, or personal. Remember that seeking support is a positive step.
+
+Some general resources that might be helpful:
+• Campus counseling services
+• Academic support centers
+• Student wellness programs
+• Peer support groups
 
-Student's message: {student_message}
+Is there something specific you'd like to talk about? I'm here to help in any way I can."""
 
-Sentiment analysis of their message: {sentiment_analysis}
+# System prompts for different scenarios
+SYSTEM_PROMPTS = {
+    'general_support': """You are a compassionate and professional student support counselor AI. Your role is to provide emotional support, guidance, and resources to students who may be struggling.
 
 Guidelines for your response:
 1. Be empathetic, warm, and non-judgmental
@@ -86,20 +91,9 @@ Guidelines for your response:
 7. Offer hope and remind them that difficulties are temporary
 8. Suggest campus resources or study strategies if relevant
 
-Respond in a caring, supportive manner that helps the student feel heard and understood:
-"""
-            ),
-            
-            'high_risk': PromptTemplate(
-                input_variables=["student_message", "sentiment_analysis", "chat_history"],
-                template="""
-You are a Crisis-trained student support counselor AI. The student's message shows signs of serious emotional distress or potential self-harm.
-
-Current conversation context: {chat_history}
+Respond in a caring, supportive manner that helps the student feel heard and understood.""",
 
-Student's message: {student_message}
-
-Sentiment analysis (HIGH RISK detected): {sentiment_analysis}
+    'high_risk': """You are a Crisis-trained student support counselor AI. The student's message shows signs of serious emotional distress or potential self-harm.
 
 CRITICAL GUIDELINES:
 1. Take their feelings seriously and validate their pain
@@ -112,20 +106,9 @@ CRITICAL GUIDELINES:
 8. DO NOT dismiss their feelings or offer simple solutions
 9. Focus on immediate safety and professional support
 
-Respond with compassion while prioritizing their safety and encouraging professional help:
-"""
-            ),
-            
-            'academic_stress': PromptTemplate(
-                input_variables=["student_message", "sentiment_analysis", "chat_history"],
-                template="""
-You are a student support counselor AI specializing in academic stress and study challenges.
-
-Current conversation context: {chat_history}
+Respond with compassion while prioritizing their safety and encouraging professional help.""",
 
-Student's message: {student_message}
-
-Sentiment analysis: {sentiment_analysis}
+    'academic_stress': """You are a student support counselor AI specializing in academic stress and study challenges.
 
 Guidelines for your response:
 1. Acknowledge the academic pressures they're facing
@@ -137,36 +120,263 @@ Guidelines for your response:
 7. Help them reframe negative thoughts about their abilities
 8. Ask about specific challenges they're facing
 
-Provide supportive guidance that addresses both emotional and practical aspects of academic stress:
-"""
-            )
-        }
+Provide supportive guidance that addresses both emotional and practical aspects of academic stress."""
+}
+
+# Crisis resources
+CRISIS_RESOURCES = MappingProxyType({
+    'crisis_hotline': '988 (Suicide & Crisis Lifeline)',
+    'text_line': 'Text HOME to 741741 (Crisis Text Line)',
+    'campus_counseling': 'Contact your campus counseling center',
+    'emergency': 'Call 911 or go to nearest emergency room if in immediate danger'
+})
+
+# Academic resources
+ACADEMIC_RESOURCES = MappingProxyType({
+    'tutoring': 'Academic tutoring center',
+    'writing_center': 'Writing support center',
+    'study_groups': 'Study groups and peer support',
+    'time_management': 'Academic success workshops',
+    'disability_services': 'Disability support services'
+})
+
+# Resource entries attached to chat responses, built once at import
+_HIGH_RISK_RESOURCE_BLOCK = (
+    {'type': 'crisis', 'name': 'Crisis Hotline', 'contact': CRISIS_RESOURCES['crisis_hotline']},
+    {'type': 'crisis', 'name': 'Crisis Text Line', 'contact': CRISIS_RESOURCES['text_line']},
+    {'type': 'professional', 'name': 'Campus Counseling', 'contact': CRISIS_RESOURCES['campus_counseling']}
+)
+_ACADEMIC_RESOURCE_BLOCK = (
+    {'type': 'academic', 'name': 'Tutoring Center', 'description': ACADEMIC_RESOURCES['tutoring']},
+    {'type': 'academic', 'name': 'Writing Center', 'description': ACADEMIC_RESOURCES['writing_center']},
+    {'type': 'academic', 'name': 'Study Skills', 'description': ACADEMIC_RESOURCES['time_management']}
+)
+
+# (epoch second, formatted) pair reused by _now_iso within the same second
+_timestamp_cache = (0, '')
+
+
+def _now_iso() -> str:
+    """Current local time in ISO format, formatted at most once per second"""
+    global _timestamp_cache
+    second = int(time.time())
+    cached_second, formatted = _timestamp_cache
+    if second != cached_second:
+        formatted = datetime.fromtimestamp(second).isoformat()
+        _timestamp_cache = (second, formatted)
+    return formatted
+
+
+def _load_langchain():
+    """Import the LangChain classes used by the OpenAI path"""
+    global ChatOpenAI, AIMessage, HumanMessage, SystemMessage, AuthenticationError
+    if ChatOpenAI is None:
+        from langchain_openai import ChatOpenAI
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+        from openai import AuthenticationError
+
+
+class SemanticCache:
+    """Reuses LLM replies for paraphrased messages (needs sentence-transformers)"""
+    
+    def __init__(self, threshold: float = 0.87, max_entries: int = 1024):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._encoder = None  # set by load(); False if the model can't be loaded
+        self._buckets = {}  # response_type -> [embeddings, responses, last_used]
+        self._clock = 0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+    
+    def load(self):
+        """Load the embedding model once; concurrent callers wait for the first"""
+        with self._load_lock:
+            if self._encoder is not None:
+                return
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._encoder = SentenceTransformer('all-MiniLM-L6-v2')
+            except ImportError:
+                self._encoder = False
+            except Exception as e:
+                logger.warning("Semantic cache disabled, embedding model failed to load: %s", e)
+                self._encoder = False
+    
+    def _encode(self, message: str):
+        # Never loads the model on a request: until load() finishes the cache is skipped
+        encoder = self._encoder
+        if not encoder:
+            return None
+        return encoder.encode(message, normalize_embeddings=True).astype(np.float32)
+    
+    def lookup(self, response_type: str, message: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """Return (cached response or None, message embedding for a later store)"""
+        embedding = self._encode(message)
+        if embedding is None:
+            return None, None
+        
+        with self._lock:
+            bucket = self._buckets.get(response_type)
+            if bucket is None:
+                return None, embedding
+            embeddings, responses, last_used = bucket
+            # Embeddings are unit length, so one GEMV gives every cosine similarity
+            scores = embeddings @ embedding
+            best = int(scores.argmax())
+            if scores[best] < self.threshold:
+                return None, embedding
+            self._clock += 1
+            last_used[best] = self._clock
+            return responses[best], embedding
+    
+    def store(self, response_type: str, embedding: np.ndarray, response: str):
+        with self._lock:
+            self._clock += 1
+            bucket = self._buckets.get(response_type)
+            if bucket is None:
+                self._buckets[response_type] = [embedding[np.newaxis, :], [response], [self._clock]]
+                return
+            embeddings, responses, last_used = bucket
+            if len(responses) < self.max_entries:
+                bucket[0] = np.vstack((embeddings, embedding))
+                responses.append(response)
+                last_used.append(self._clock)
+            else:
+                # Overwrite the least recently used entry
+                slot = last_used.index(min(last_used))
+                embeddings[slot] = embedding
+                responses[slot] = response
+                last_used[slot] = self._clock
+
+
+class _ChatBatcher:
+    """Groups concurrent LLM requests into a single abatch() call"""
+    
+    def __init__(self, llm, max_batch: int = 32, max_wait: float = 0.02):
+        self.llm = llm
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._loop = None
+        self._queue = None
+        self._worker = None
+    
+    async def submit(self, messages: List):
+        """Queue a prompt and wait for the model's reply"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # The queue and worker task belong to a single event loop
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(loop, self._queue))
+        future = loop.create_future()
+        self._queue.put_nowait((messages, future))
+        return await future
+    
+    async def _run(self, loop, queue):
+        while True:
+            # Wait for a first request, then collect more for up to max_wait
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            pending = [(messages, future) for messages, future in batch if not future.cancelled()]
+            if not pending:
+                continue
+            try:
+                results = await self.llm.abatch([messages for messages, _ in pending],
+                                                return_exceptions=True)
+            except Exception as e:
+                results = [e] * len(pending)
+            for (_, future), result in zip(pending, results):
+                if future.cancelled():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+class StudentSupportChatbot:
+    """AI-powered chatbot for student emotional support and guidance"""
+    
+    def __init__(self):
+        # Check if OpenAI API key is available
+        self.api_key = os.getenv('OPENAI_API_KEY')
+        logger.debug("API key found: %s", 'Yes' if self.api_key else 'No')
+        if self.api_key:
+            logger.debug("API key starts with: %s...", self.api_key[:5])
+            logger.debug("API key length: %d", len(self.api_key))
+            
+        self.use_openai = bool(self.api_key and self.api_key != 'your-api-key-here' and len(self.api_key) > 10)
+        logger.debug("Using OpenAI: %s", self.use_openai)
+        # The key is validated by the first real request rather than a test
+        # call at startup (see _disable_openai)
+        self._openai_verified = False
         
-        # Create chains for different scenarios (only if using OpenAI)
         if self.use_openai:
-            self.chains = {
-                scenario: LLMChain(llm=self.llm, prompt=prompt, memory=self.memory)
-                for scenario, prompt in self.prompts.items()
-            }
+            try:
+                logger.debug("Attempting to initialize OpenAI...")
+                _load_langchain()
+                self.llm = ChatOpenAI(
+                    model="gpt-3.5-turbo",
+                    temperature=0.7
+                )
+            except Exception as e:
+                logger.error("Failed to initialize OpenAI. Error type: %s", type(e).__name__)
+                logger.error("Error details: %s", e)
+                if hasattr(e, 'response'):
+                    logger.error("API Response: %s", e.response.text)
+                self.use_openai = False
         else:
-            self.chains = {}
+            logger.warning("No valid OpenAI API key found. Using rule-based chatbot.")
+            if not self.api_key:
+                logger.warning("OPENAI_API_KEY environment variable is not set")
+            elif self.api_key == 'your-api-key-here':
+                logger.warning("Please replace 'your-api-key-here' with your actual OpenAI API key")
+            elif len(self.api_key) <= 10:
+                logger.warning("API key is too short (length: %d). It should be around 51 characters.", len(self.api_key))
         
-        # Crisis resources
-        self.crisis_resources = {
-            'crisis_hotline': '988 (Suicide & Crisis Lifeline)',
-            'text_line': 'Text HOME to 741741 (Crisis Text Line)',
-            'campus_counseling': 'Contact your campus counseling center',
-            'emergency': 'Call 911 or go to nearest emergency room if in immediate danger'
-        }
+        # Static system prompt per scenario; history is sent as separate chat
+        # messages and the per-call fields as a final user message, so the
+        # prefix stays byte-identical across requests and turns and
+        # provider-side prompt caching can reuse it
+        self._prompt_prefix = {
+            scenario: SystemMessage(content=prompt)
+            for scenario, prompt in SYSTEM_PROMPTS.items()
+        } if self.use_openai else {}
         
-        # Academic resources
-        self.academic_resources = {
-            'tutoring': 'Academic tutoring center',
-            'writing_center': 'Writing support center',
-            'study_groups': 'Study groups and peer support',
-            'time_management': 'Academic success workshops',
-            'disability_services': 'Disability support services'
+        self.semantic_cache = SemanticCache()
+        if self.use_openai:
+            # The model may have to be downloaded, so load it off the request path
+            threading.Thread(target=self.semantic_cache.load, name='semantic-cache-load',
+                             daemon=True).start()
+        self.batcher = _ChatBatcher(self.llm) if self.use_openai else None
+        
+        # Per-call user block, filled with str.format_map
+        self._user_template = {
+            response_type: (
+                "Student's message: {student_message}\n\n"
+                + label + ":\n{sentiment_analysis}"
+            )
+            for response_type, label in (
+                ('general_support', "Sentiment analysis of their message"),
+                ('high_risk', "Sentiment analysis (HIGH RISK detected)"),
+                ('academic_stress', "Sentiment analysis")
+            )
         }
+        
+        # Fallback keyword scans: one precompiled alternation per category
+        # so each message is scanned once instead of once per keyword
+        self._crisis_re = self._compile_keywords(CRISIS_KEYWORDS)
+        self._academic_re = self._compile_keywords(ACADEMIC_KEYWORDS)
+        self._emotion_re = self._compile_keywords(EMOTION_KEYWORDS)
     
     def chat(self, student_id: str, message: str, chat_history: List[Dict] = None) -> Dict:
         """
@@ -184,13 +394,136 @@ Provide supportive guidance that addresses both emotional and practical aspects
             return self._get_default_response()
         
         # Analyze sentiment of the message
-        print(f"DEBUG: Analyzing sentiment for message: {message}")
+        sentiment_analysis = self._analyze_message(message)
+        
+        # Pull the fields the helpers need out of the analysis once
+        risk_level = sentiment_analysis['risk_level']
+        has_academic_stress = sentiment_analysis['academic_stress']['has_academic_stress']
+        
+        # Determine appropriate response type based on sentiment analysis
+        response_type = self._determine_response_type(risk_level, has_academic_stress)
+        
+        # Generate response using appropriate chain or fallback
+        try:
+            # Paraphrases of an earlier message reuse its reply; high-risk
+            # messages always get a fresh response. Only opening messages take
+            # part: a reply written with one student's history must never be
+            # served to another student (embedding stays None, so it isn't stored)
+            cached, embedding = None, None
+            if self.use_openai and risk_level != 'high' and not chat_history:
+                cached, embedding = self.semantic_cache.lookup(response_type, message)
+            
+            response = cached
+            if response is None and self.use_openai:
+                try:
+                    response = self.llm.invoke(self._prompt_messages(
+                        response_type, message,
+                        self._format_sentiment_for_prompt(
+                            risk_level, sentiment_analysis['overall_sentiment'],
+                            sentiment_analysis['emotion_analysis']['detected_keywords'],
+                            has_academic_stress, sentiment_analysis['needs_attention']
+                        ),
+                        self._history_messages(chat_history or [])
+                    )).content
+                except AuthenticationError as e:
+                    self._disable_openai(e)
+                else:
+                    self._mark_openai_verified()
+                    if embedding is not None:
+                        self.semantic_cache.store(response_type, embedding, response)
+            
+            if response is None:
+                # Use rule-based fallback response
+                response = self._get_fallback_response(message, risk_level, response_type)
+            
+            return self._build_chat_response(student_id, message, response, sentiment_analysis,
+                                             response_type, risk_level)
+            
+        except Exception as e:
+            logger.error("Error generating chatbot response: %s", e)
+            return self._get_error_response(student_id, message)
+    
+    async def achat(self, student_id: str, message: str, chat_history: List[Dict] = None) -> Dict:
+        """
+        Async variant of chat() for callers running an event loop
+        
+        Builds the same prompt and uses the same semantic cache as chat();
+        sentiment analysis and the cache lookup run in a worker thread so the
+        loop is never blocked. Requests go through the micro-batcher except
+        high_risk ones.
+        """
+        if not message or not message.strip():
+            return self._get_default_response()
+        
+        loop = asyncio.get_running_loop()
+        sentiment_analysis = await loop.run_in_executor(None, self._analyze_message, message)
+        risk_level = sentiment_analysis['risk_level']
+        has_academic_stress = sentiment_analysis['academic_stress']['has_academic_stress']
+        response_type = self._determine_response_type(risk_level, has_academic_stress)
+        
+        try:
+            # Same caching rules as chat()
+            cached, embedding = None, None
+            if self.use_openai and risk_level != 'high' and not chat_history:
+                cached, embedding = await loop.run_in_executor(
+                    None, self.semantic_cache.lookup, response_type, message
+                )
+            
+            response = cached
+            if response is None and self.use_openai:
+                prompt = self._prompt_messages(
+                    response_type, message,
+                    self._format_sentiment_for_prompt(
+                        risk_level, sentiment_analysis['overall_sentiment'],
+                        sentiment_analysis['emotion_analysis']['detected_keywords'],
+                        has_academic_stress, sentiment_analysis['needs_attention']
+                    ),
+                    self._history_messages(chat_history or [])
+                )
+                try:
+                    # High-risk replies skip the batching window
+                    if response_type == 'high_risk':
+                        response = (await self.llm.ainvoke(prompt)).content
+                    else:
+                        response = (await self.batcher.submit(prompt)).content
+                except AuthenticationError as e:
+                    self._disable_openai(e)
+                else:
+                    self._mark_openai_verified()
+                    if embedding is not None:
+                        self.semantic_cache.store(response_type, embedding, response)
+            
+            if response is None:
+                response = self._get_fallback_response(message, risk_level, response_type)
+            
+            return self._build_chat_response(student_id, message, response, sentiment_analysis,
+                                             response_type, risk_level)
+            
+        except Exception as e:
+            logger.error("Error generating chatbot response: %s", e)
+            return self._get_error_response(student_id, message)
+    
+    def _mark_openai_verified(self):
+        """Record that the API key has been accepted once"""
+        if not self._openai_verified:
+            self._openai_verified = True
+            logger.info("OpenAI chatbot verified on first request")
+    
+    def _disable_openai(self, error: Exception):
+        """Fall back to rule-based replies for good once the API key is rejected"""
+        logger.warning("OpenAI API key rejected: %s", error)
+        logger.warning("Continuing with OpenAI disabled. Chatbot will use rule-based responses.")
+        self.use_openai = False
+    
+    def _analyze_message(self, message: str) -> Dict:
+        """Run sentiment analysis, falling back to a neutral structure"""
+        logger.debug("Analyzing sentiment for message: %s", message)
         sentiment_analysis = sentiment_analyzer.analyze_sentiment(message)
-        print(f"DEBUG: Sentiment analysis result: {sentiment_analysis}")
+        logger.debug("Sentiment analysis result: %s", sentiment_analysis)
         
         # Validate sentiment analysis structure
         if not sentiment_analysis or 'risk_level' not in sentiment_analysis:
-            print(f"ERROR: Invalid sentiment analysis structure: {sentiment_analysis}")
+            logger.error("Invalid sentiment analysis structure: %s", sentiment_analysis)
             # Create a default structure
             sentiment_analysis = {
                 'risk_level': 'low',
@@ -201,47 +534,34 @@ Provide supportive guidance that addresses both emotional and practical aspects
                 'counselor_referral': False,
                 'needs_attention': False
             }
+        return sentiment_analysis
+    
+    def _prompt_messages(self, response_type: str, message: str, sentiment_text: str,
+                         history_messages: List) -> List:
+        """Static system prompt, prior turns, then the per-call user block"""
+        user_block = self._user_template[response_type].format_map({
+            'student_message': message,
+            'sentiment_analysis': sentiment_text
+        })
+        return [self._prompt_prefix[response_type], *history_messages, HumanMessage(content=user_block)]
+    
+    def _build_chat_response(self, student_id: str, message: str, response: str,
+                             sentiment_analysis: Dict, response_type: str, risk_level: str) -> Dict:
+        """Assemble the response object returned to the web layer"""
+        # Add resources if needed
+        resources = self._get_relevant_resources(risk_level, response_type)
         
-        # Format chat history for context
-        formatted_history = self._format_chat_history(chat_history or [])
-        
-        # Determine appropriate response type based on sentiment analysis
-        response_type = self._determine_response_type(sentiment_analysis)
-        
-        # Generate response using appropriate chain or fallback
-        try:
-            if self.use_openai and response_type in self.chains:
-                chain = self.chains[response_type]
-                response = chain.run(
-                    student_message=message,
-                    sentiment_analysis=self._format_sentiment_for_prompt(sentiment_analysis),
-                    chat_history=formatted_history
-                )
-            else:
-                # Use rule-based fallback response
-                response = self._get_fallback_response(message, sentiment_analysis, response_type)
-            
-            # Add resources if needed
-            resources = self._get_relevant_resources(sentiment_analysis, response_type)
-            
-            # Create response object
-            chat_response = {
-                'student_id': student_id,
-                'timestamp': datetime.now().isoformat(),
-                'student_message': message,
-                'bot_response': response.strip(),
-                'sentiment_analysis': sentiment_analysis,
-                'response_type': response_type,
-                'resources_provided': resources,
-                'needs_human_intervention': sentiment_analysis['risk_level'] == 'high',
-                'counselor_alert': sentiment_analysis['counselor_referral']
-            }
-            
-            return chat_response
-            
-        except Exception as e:
-            print(f"Error generating chatbot response: {e}")
-            return self._get_error_response(student_id, message)
+        return {
+            'student_id': student_id,
+            'timestamp': _now_iso(),
+            'student_message': message,
+            'bot_response': response.strip(),
+            'sentiment_analysis': sentiment_analysis,
+            'response_type': response_type,
+            'resources_provided': resources,
+            'needs_human_intervention': risk_level == 'high',
+            'counselor_alert': sentiment_analysis['counselor_referral']
+        }
     
     def get_conversation_summary(self, chat_history: List[Dict]) -> Dict:
         """
@@ -256,17 +576,21 @@ Provide supportive guidance that addresses both emotional and practical aspects
         if not chat_history:
             return {'summary': 'No conversation history', 'recommendations': []}
         
-        # Analyze sentiment trends
-        messages = [chat['student_message'] for chat in chat_history]
-        sentiment_analyses = [chat.get('sentiment_analysis', {}) for chat in chat_history]
+        # Collect analyses, risk counts and concerns in a single pass
+        sentiment_analyses = []
+        risk_counts = Counter()
+        concerns_seen = {}  # dict keeps first-seen order
+        for chat in chat_history:
+            sentiment = chat.get('sentiment_analysis', {})
+            sentiment_analyses.append(sentiment)
+            risk_counts[sentiment.get('risk_level')] += 1
+            for risk_level, keyword in sentiment.get('emotion_analysis', {}).get('detected_keywords', []):
+                if risk_level in ('high_risk', 'medium_risk'):
+                    concerns_seen[keyword] = None
         
         trends = sentiment_analyzer.get_sentiment_trends(sentiment_analyses)
-        
-        # Count concerning messages
-        high_risk_count = sum(1 for chat in chat_history if 
-                             chat.get('sentiment_analysis', {}).get('risk_level') == 'high')
-        medium_risk_count = sum(1 for chat in chat_history if 
-                               chat.get('sentiment_analysis', {}).get('risk_level') == 'medium')
+        high_risk_count = risk_counts['high']
+        medium_risk_count = risk_counts['medium']
         
         # Generate summary
         summary = {
@@ -277,76 +601,47 @@ Provide supportive guidance that addresses both emotional and practical aspects
             'medium_risk_messages': medium_risk_count,
             'needs_human_review': high_risk_count > 0 or medium_risk_count >= 3,
             'last_interaction': chat_history[-1]['timestamp'] if chat_history else None,
-            'key_concerns': self._extract_key_concerns(chat_history),
+            'key_concerns': list(concerns_seen)[:5],  # Top 5 concerns
             'recommendations': self._generate_recommendations(trends, high_risk_count, medium_risk_count)
         }
         
         return summary
     
-    def _determine_response_type(self, sentiment_analysis: Dict) -> str:
+    def _determine_response_type(self, risk_level: str, has_academic_stress: bool) -> str:
         """Determine which type of response to generate"""
-        if sentiment_analysis['risk_level'] == 'high':
+        if risk_level == 'high':
             return 'high_risk'
-        elif sentiment_analysis['academic_stress']['has_academic_stress']:
+        elif has_academic_stress:
             return 'academic_stress'
         else:
             return 'general_support'
     
-    def _format_sentiment_for_prompt(self, sentiment_analysis: Dict) -> str:
+    def _format_sentiment_for_prompt(self, risk_level: str, overall_sentiment: str, keywords: List,
+                                     has_academic_stress: bool, needs_attention: bool) -> str:
         """Format sentiment analysis for LLM prompt"""
-        return f"""
-        Risk Level: {sentiment_analysis['risk_level']}
-        Overall Sentiment: {sentiment_analysis['overall_sentiment']}
-        Emotional Keywords: {sentiment_analysis['emotion_analysis']['detected_keywords']}
-        Academic Stress: {sentiment_analysis['academic_stress']['has_academic_stress']}
-        Needs Attention: {sentiment_analysis['needs_attention']}
-        """
+        return '\n'.join((
+            'Risk Level: ' + risk_level,
+            'Overall Sentiment: ' + overall_sentiment,
+            'Emotional Keywords: ' + str(keywords),
+            'Academic Stress: ' + str(has_academic_stress),
+            'Needs Attention: ' + str(needs_attention)
+        ))
     
-    def _format_chat_history(self, chat_history: List[Dict]) -> str:
-        """Format chat history for context"""
-        if not chat_history:
-            return "This is the start of the conversation."
-        
-        formatted = []
-        for chat in chat_history[-5:]:  # Last 5 exchanges for context
-            formatted.append(f"Student: {chat['student_message']}")
-            formatted.append(f"Counselor: {chat['bot_response']}")
-        
-        return "\n".join(formatted)
+    def _history_messages(self, chat_history: List[Dict]) -> List:
+        """Turn prior exchanges into chat messages (last 20 for context)"""
+        history = deque(maxlen=20)
+        for chat in chat_history[-20:]:
+            if chat.get('student_message'):
+                history.append(HumanMessage(content=chat['student_message']))
+            if chat.get('bot_response'):
+                history.append(AIMessage(content=chat['bot_response']))
+        return list(history)
     
-    def _get_relevant_resources(self, sentiment_analysis: Dict, response_type: str) -> List[Dict]:
+    def _get_relevant_resources(self, risk_level: str, response_type: str) -> Tuple[Dict, ...]:
         """Get relevant resources based on the conversation"""
-        resources = []
-        
-        if sentiment_analysis['risk_level'] == 'high':
-            resources.extend([
-                {'type': 'crisis', 'name': 'Crisis Hotline', 'contact': self.crisis_resources['crisis_hotline']},
-                {'type': 'crisis', 'name': 'Crisis Text Line', 'contact': self.crisis_resources['text_line']},
-                {'type': 'professional', 'name': 'Campus Counseling', 'contact': self.crisis_resources['campus_counseling']}
-            ])
-        
-        if response_type == 'academic_stress':
-            resources.extend([
-                {'type': 'academic', 'name': 'Tutoring Center', 'description': self.academic_resources['tutoring']},
-                {'type': 'academic', 'name': 'Writing Center', 'description': self.academic_resources['writing_center']},
-                {'type': 'academic', 'name': 'Study Skills', 'description': self.academic_resources['time_management']}
-            ])
-        
-        return resources
-    
-    def _extract_key_concerns(self, chat_history: List[Dict]) -> List[str]:
-        """Extract key concerns from conversation"""
-        concerns = []
-        
-        for chat in chat_history:
-            sentiment = chat.get('sentiment_analysis', {})
-            keywords = sentiment.get('emotion_analysis', {}).get('detected_keywords', [])
-            
-            for risk_level, keyword in keywords:
-                if risk_level in ['high_risk', 'medium_risk'] and keyword not in concerns:
-                    concerns.append(keyword)
-        
-        return concerns[:5]  # Top 5 concerns
+        # The blocks are shared, prebuilt tuples; callers only serialize them
+        return ((_HIGH_RISK_RESOURCE_BLOCK if risk_level == 'high' else ())
+                + (_ACADEMIC_RESOURCE_BLOCK if response_type == 'academic_stress' else ()))
     
     def _generate_recommendations(self, trends: Dict, high_risk_count: int, medium_risk_count: int) -> List[str]:
         """Generate recommendations for human counselors"""
@@ -371,7 +666,7 @@ Provide supportive guidance that addresses both emotional and practical aspects
         """Default response for empty messages"""
         return {
             'student_id': 'unknown',
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _now_iso(),
             'student_message': '',
             'bot_response': "Hi there! I'm here to listen and support you. How are you feeling today?",
             'sentiment_analysis': {},
@@ -385,7 +680,7 @@ Provide supportive guidance that addresses both emotional and practical aspects
         """Error response when chatbot fails"""
         return {
             'student_id': student_id,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _now_iso(),
             'student_message': message,
             'bot_response': "I'm sorry, I'm having trouble responding right now. Please reach out to a human counselor if you need immediate support. You can contact the campus counseling center or call 988 for Crisis support.",
             'sentiment_analysis': {
@@ -406,98 +701,63 @@ Provide supportive guidance that addresses both emotional and practical aspects
             'counselor_alert': True
         }
     
-    def _get_fallback_response(self, message: str, sentiment_analysis: Dict, response_type: str) -> str:
+    @staticmethod
+    def _compile_keywords(keywords: frozenset) -> re.Pattern:
+        """Compile keywords into a single word-bounded alternation"""
+        return re.compile(r'\b(?:' + '|'.join(map(re.escape, sorted(keywords))) + r')\b')
+    
+    def _get_fallback_response(self, message: str, risk_level: str, response_type: str) -> str:
         """Generate rule-based response when OpenAI is not available"""
         
         # Use sentiment analysis first if available
-        if sentiment_analysis and sentiment_analysis.get('risk_level') == 'high':
-            return """I'm very concerned about what you're sharing with me. Your safety and wellbeing are the most important things right now. 
-
- Please reach out for immediate help:
- • Crisis Hotline: 988 (Suicide & crises Lifeline)
- • crises Text Line: Text HOME to 741741
- • Emergency: Call 911 if you're in immediate danger
- 
- You don't have to go through this alone. There are people who want to help you."""
+        if risk_level == 'high':
+            return _CRISIS_REPLY
 
         # Check for Crisis keywords with word boundaries
-        crisis_keywords = ['suicide', 'kill myself', 'end it all', 'hurt myself', 'die', 'hopeless']
         message_lower = message.lower()
-        # Check for crisis keywords with correct variable name
-        if any(re.search(r'\b' + re.escape(keyword) + r'\b', message_lower) for keyword in crisis_keywords):
-            return """I'm very concerned about what you're sharing with me. Your safety and wellbeing are the most important things right now. 
-
- Please reach out for immediate help:
- • Crisis Hotline: 988 (Suicide & Crisis Lifeline)
- • Crisis Text Line: Text HOME to 741741
- • Emergency: Call 911 if you're in immediate danger
- 
- You don't have to go through this alone. There are people who want to help you."""
+        if self._crisis_re.search(message_lower):
+            return _CRISIS_REPLY
 
         # Check for academic stress with word boundaries
-        academic_keywords = ['exam', 'test', 'grade', 'study', 'homework', 'assignment', 'fail', 'stress']
-        if any(re.search(r'\b' + re.escape(keyword) + r'\b', message_lower) for keyword in academic_keywords):
-            return """I understand that academic challenges can feel overwhelming. It's completely normal to feel stressed about your studies.
-
-Here are some strategies that might help:
-• Break large tasks into smaller, manageable steps
-• Create a study schedule and stick to it
-• Take regular breaks to avoid burnout
-• Reach out to your professors during office hours
-• Consider forming study groups with classmates
-• Visit the tutoring center for additional support
-
-Remember, asking for help is a sign of strength, not weakness. What specific academic challenge would you like to talk about?"""
+        if self._academic_re.search(message_lower):
+            return _ACADEMIC_REPLY
 
         # Check for general emotional support with word boundaries
-        emotion_keywords = ['sad', 'depressed', 'anxious', 'worried', 'scared', 'lonely', 'overwhelmed']
-        if any(re.search(r'\b' + re.escape(keyword) + r'\b', message_lower) for keyword in emotion_keywords):
-            return """Thank you for sharing your feelings with me. It takes courage to reach out when you're struggling.
-
-What you're experiencing is valid, and you're not alone in feeling this way. Many students go through similar challenges.
-
-Some things that might help:
-• Practice deep breathing or mindfulness exercises
-• Maintain a regular sleep schedule
-• Stay connected with friends and family
-• Engage in activities you enjoy
-• Consider speaking with a counselor
-
-Would you like to talk more about what's been on your mind? I'm here to listen and support you."""
+        if self._emotion_re.search(message_lower):
+            return _EMOTION_REPLY
 
         # Default supportive response
-        return """Thank you for reaching out. I'm here to listen and support you through whatever you're going through.
-
-As a student, it's normal to face various challenges - whether they're academic, social, or personal. Remember that seeking support is a positive step.
-
-Some general resources that might be helpful:
-• Campus counseling services
-• Academic support centers
-• Student wellness programs
-• Peer support groups
-
-Is there something specific you'd like to talk about? I'm here to help in any way I can."""
+        return _DEFAULT_REPLY
 
 
 _chatbot_instance: Optional[StudentSupportChatbot] = None
+_chatbot_lock = threading.Lock()
 
 
 def get_chatbot() -> StudentSupportChatbot:
     """Lazily initialize and return a singleton chatbot instance."""
     global _chatbot_instance
     if _chatbot_instance is None:
-        _chatbot_instance = StudentSupportChatbot()
+        # Concurrent first requests must not each build a chatbot
+        with _chatbot_lock:
+            if _chatbot_instance is None:
+                _chatbot_instance = StudentSupportChatbot()
     return _chatbot_instance
 
 
 def process_student_message(student_id: str, message: str, chat_history: List[Dict] = None) -> Dict:
     """Convenience function for processing student messages"""
-    print(f"DEBUG: process_student_message called with student_id={student_id}, message={message}")
+    logger.debug("process_student_message called with student_id=%s, message=%s", student_id, message)
     bot = get_chatbot()
     result = bot.chat(student_id, message, chat_history)
-    print(f"DEBUG: chatbot.chat() returned: {result}")
+    logger.debug("chatbot.chat() returned: %s", result)
     return result
 
+
+async def process_student_message_async(student_id: str, message: str, chat_history: List[Dict] = None) -> Dict:
+    """Async counterpart of process_student_message"""
+    return await get_chatbot().achat(student_id, message, chat_history)
+
 def get_conversation_summary(chat_history: List[Dict]) -> Dict:
     """Convenience function for conversation summaries"""
     bot = get_chatbot()
@@ -5,24 +5,49 @@ Initializes a global connection and provides safe insert helpers.
 
 from typing import Dict, Optional
 import os
-from pymongo import MongoClient
+import logging
+import queue
+import threading
+from pymongo import MongoClient, WriteConcern
+
+logger = logging.getLogger(__name__)
 
 _mongo_client: Optional[MongoClient] = None
 _mongo_db = None
+_chat_interactions = None  # chat log collection with a relaxed write concern
+
+# Chat interactions are written by a background thread so the chat request
+# does not wait on the Mongo round-trip
+_insert_queue: queue.Queue = queue.Queue(maxsize=10_000)
+_drain_thread: Optional[threading.Thread] = None
+_INSERT_BATCH_SIZE = 100
+_INSERT_BATCH_WAIT = 0.05  # seconds to wait for more documents before flushing
 
 
 def init_mongo(uri: str) -> bool:
     """Initialize MongoDB client using provided URI. Returns True if ready."""
-    global _mongo_client, _mongo_db
+    global _mongo_client, _mongo_db, _chat_interactions
     try:
         if not uri:
-            print("[Mongo] No URI provided; Mongo disabled")
+            logger.info("No URI provided; Mongo disabled")
             return False
         if not uri.startswith("mongodb"):
-            print(f"[Mongo] URI does not look like MongoDB: {uri}")
+            logger.warning("URI does not look like MongoDB: %s", uri)
             return False
 
-        _mongo_client = MongoClient(uri, serverSelectionTimeoutMS=3000)
+        # Keep a warm pool for bursts of inserts and compress the JSON-heavy
+        # chat documents on the wire (zstd/snappy when their modules are
+        # installed, zlib otherwise)
+        _mongo_client = MongoClient(
+            uri,
+            serverSelectionTimeoutMS=3000,
+            maxPoolSize=50,
+            minPoolSize=5,
+            socketTimeoutMS=2000,
+            connectTimeoutMS=2000,
+            retryWrites=True,
+            compressors='zstd,snappy,zlib'
+        )
         # Trigger a server selection to verify connectivity
         _mongo_client.admin.command('ping')
 
@@ -34,12 +59,20 @@ def init_mongo(uri: str) -> bool:
             db_name = os.getenv('MONGO_DB_NAME', 'early_warning_system')
             _mongo_db = _mongo_client[db_name]
 
-        print(f"[Mongo] Connected to DB: {_mongo_db.name}")
+        # Chat logs only need acknowledgement from the primary, not the journal
+        _chat_interactions = _mongo_db['chat_interactions'].with_options(
+            write_concern=WriteConcern(w=1, j=False)
+        )
+
+        _start_drain_worker()
+
+        logger.info("Connected to DB: %s", _mongo_db.name)
         return True
     except Exception as e:
-        print(f"[Mongo] Initialization failed: {e}")
+        logger.error("Initialization failed: %s", e)
         _mongo_client = None
         _mongo_db = None
+        _chat_interactions = None
         return False
 
 
@@ -48,15 +81,38 @@ def get_db():
     return _mongo_db
 
 
+def _start_drain_worker():
+    """Start the background insert thread once"""
+    global _drain_thread
+    if _drain_thread is None:
+        _drain_thread = threading.Thread(target=_drain_worker, name='mongo-insert', daemon=True)
+        _drain_thread.start()
+
+
+def _drain_worker():
+    """Write queued chat interactions in batches of up to _INSERT_BATCH_SIZE."""
+    while True:
+        batch = [_insert_queue.get()]
+        try:
+            while len(batch) < _INSERT_BATCH_SIZE:
+                batch.append(_insert_queue.get(timeout=_INSERT_BATCH_WAIT))
+        except queue.Empty:
+            pass
+        try:
+            _chat_interactions.insert_many(batch, ordered=False, bypass_document_validation=True)
+        except Exception as e:
+            logger.error("insert_chat_interaction batch of %d failed: %s", len(batch), e)
+
+
 def insert_chat_interaction(doc: Dict) -> bool:
-    """Insert a chat interaction document into Mongo, return success."""
+    """Queue a chat interaction document for Mongo, return True if queued."""
+    if _chat_interactions is None:
+        return False
     try:
-        if _mongo_db is None:
-            return False
-        _mongo_db['chat_interactions'].insert_one(doc)
+        _insert_queue.put_nowait(doc)
         return True
-    except Exception as e:
-        print(f"[Mongo] insert_chat_interaction failed: {e}")
+    except queue.Full:
+        logger.warning("insert_chat_interaction queue full; dropping document")
         return False
 
 
@@ -65,8 +121,8 @@ def insert_alert(doc: Dict) -> bool:
     try:
         if _mongo_db is None:
             return False
-        _mongo_db['alerts'].insert_one(doc)
+        _mongo_db['alerts'].insert_one(doc, bypass_document_validation=True)
         return True
     except Exception as e:
-        print(f"[Mongo] insert_alert failed: {e}")
+        logger.error("insert_alert failed: %s", e)
         return False
\ No newline at end of file
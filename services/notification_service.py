@@ -5,179 +5,81 @@ Supports Email and SMS notifications for high-risk students
 
 import smtplib
 import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import sys
+from email.message import EmailMessage
+from email.utils import make_msgid
 from datetime import datetime
 import json
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from jinja2 import Environment
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; the notification log uses json otherwise
+    orjson = None
 
-class NotificationService:
-    def __init__(self):
-        """Initialize notification service"""
-        self.email_enabled = self._check_email_config()
-        self.sms_enabled = self._check_sms_config()
-        self.notification_log = []
-        
-    def _check_email_config(self):
-        """Check if email configuration is available"""
-        return all([
-            os.getenv('SMTP_SERVER'),
-            os.getenv('SMTP_PORT'),
-            os.getenv('SMTP_USERNAME'),
-            os.getenv('SMTP_PASSWORD')
-        ])
-    
-    def _check_sms_config(self):
-        """Check if SMS configuration is available (Twilio)"""
-        return all([
-            os.getenv('TWILIO_ACCOUNT_SID'),
-            os.getenv('TWILIO_AUTH_TOKEN'),
-            os.getenv('TWILIO_PHONE_NUMBER')
-        ])
-    
-    def send_high_risk_alert(self, student_data, parent_contact, alert_type='email'):
-        """Send high risk alert to parent/guardian"""
-        print(f"[DEBUG] send_high_risk_alert called with student_data: {student_data}")
-        print(f"[DEBUG] student_data keys: {list(student_data.keys())}")
-        print(f"[DEBUG] alert_type: {alert_type}")
-        print(f"[DEBUG] email_enabled: {self.email_enabled}")
-        print(f"[DEBUG] parent_contact: {parent_contact}")
-        
-        if not student_data or 'name' not in student_data:
-            print("[ERROR] Invalid student_data: missing 'name' key")
-            return False
-        
-        success = False
-        
-        if alert_type in ['email', 'both']:
-            print(f"[DEBUG] Processing email alert...")
-            if self.email_enabled and parent_contact.get('email'):
-                print(f"[DEBUG] Sending actual email to {parent_contact['email']}")
-                success = self._send_email_alert(student_data, parent_contact['email'])
-            else:
-                print(f"[DEBUG] Simulating email to {parent_contact.get('email', 'parent@example.com')}")
-                success = self._simulate_email_alert(student_data, parent_contact.get('email', 'parent@example.com'))
-            print(f"[DEBUG] Email result: {success}")
-        
-        if alert_type in ['sms', 'both']:
-            print(f"[DEBUG] Processing SMS alert...")
-            if self.sms_enabled and parent_contact.get('phone'):
-                sms_success = self._send_sms_alert(student_data, parent_contact['phone'])
-            else:
-                sms_success = self._simulate_sms_alert(student_data, parent_contact.get('phone', '+1234567890'))
-            print(f"[DEBUG] SMS result: {sms_success}")
-            
-            # Only update success if this is the primary alert type or if both are being processed
-            if alert_type == 'sms' or (alert_type == 'both' and success):
-                success = sms_success
-        
-        # Log the notification
-        self._log_notification(student_data, parent_contact, alert_type, success)
-        print(f"[DEBUG] Final success result: {success}")
-        
-        return success
-    
-    def _send_email_alert(self, student_data, parent_email):
-        """Send actual email alert (requires SMTP configuration)"""
-        try:
-            # Email configuration from environment variables
-            smtp_server = os.getenv('SMTP_SERVER')
-            smtp_port = int(os.getenv('SMTP_PORT', 587))
-            smtp_username = os.getenv('SMTP_USERNAME')
-            smtp_password = os.getenv('SMTP_PASSWORD')
-            from_email = os.getenv('FROM_EMAIL', smtp_username)
-            
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = f"URGENT: Academic Alert for {student_data['name']}"
-            msg['From'] = from_email
-            msg['To'] = parent_email
-            
-            # Email body
-            html_body = self._generate_email_template(student_data)
-            
-            msg.attach(MIMEText(html_body, 'html'))
-            
-            # Send email
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
-                server.starttls()
-                server.login(smtp_username, smtp_password)
-                server.send_message(msg)
-            
-            print(f"[OK] Email sent to {parent_email}")
-            return True
-            
-        except Exception as e:
-            print(f"[ERROR] Failed to send email: {e}")
-            return False
-    
-    def _simulate_email_alert(self, student_data, parent_email):
-        """Simulate email alert for demo (when SMTP not configured)"""
-        print("\n" + "="*70)
-        print("EMAIL ALERT SIMULATION")
-        print("="*70)
-        print(f"To: {parent_email}")
-        print(f"Subject: URGENT: Academic Alert for {student_data['name']}")
-        print("-"*70)
-        print(self._generate_email_text(student_data))
-        print("="*70 + "\n")
-        return True
-    
-    def _send_sms_alert(self, student_data, parent_phone):
-        """Send actual SMS alert using Twilio"""
-        try:
-            from twilio.rest import Client
-            
-            account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-            auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-            from_phone = os.getenv('TWILIO_PHONE_NUMBER')
-            
-            client = Client(account_sid, auth_token)
-            
-            message_body = self._generate_sms_text(student_data)
-            
-            message = client.messages.create(
-                body=message_body,
-                from_=from_phone,
-                to=parent_phone
-            )
-            
-            print(f"[OK] SMS sent to {parent_phone} (SID: {message.sid})")
-            return True
-            
-        except Exception as e:
-            print(f"[ERROR] Failed to send SMS: {e}")
-            return False
-    
-    def _simulate_sms_alert(self, student_data, parent_phone):
-        """Simulate SMS alert for demo (when Twilio not configured)"""
-        print("\n" + "="*70)
-        print("SMS ALERT SIMULATION")
-        print("="*70)
-        print(f"To: {parent_phone}")
-        print("-"*70)
-        print(self._generate_sms_text(student_data))
-        print("="*70 + "\n")
-        return True
-    
-    def _generate_email_template(self, student_data):
-        """Generate HTML email template"""
-        return f"""
+try:
+    from celery import Celery, group
+except ImportError:  # celery is optional; alerts are then sent in-process
+    Celery = None
+
+# Alerts are queued for a Celery worker when a broker is configured, e.g.
+#   CELERY_BROKER_URL=redis://localhost:6379/0
+#   celery -A services.notification_service.celery_app worker
+celery_app = None
+if Celery is not None and os.getenv('CELERY_BROKER_URL'):
+    celery_app = Celery(
+        'notifications',
+        broker=os.getenv('CELERY_BROKER_URL'),
+        backend=os.getenv('CELERY_RESULT_BACKEND', os.getenv('CELERY_BROKER_URL'))
+    )
+
+logger = logging.getLogger(__name__)
+
+# Twilio is imported on first use by _load_twilio(); deployments without SMS
+# never pay for importing it
+TwilioClient = None
+
+# Upper bound on parallel SMTP connections during a bulk run; most mail
+# servers throttle or reject clients that open many more than this
+_MAX_SMTP_CONNECTIONS = 8
+
+
+def _native(mapping):
+    """Copy a dict with numpy scalars (e.g. from a DataFrame row) turned into plain
+    Python values, which Celery's JSON serializer requires"""
+    return {
+        key: _native(value) if isinstance(value, dict)
+        else value.item() if hasattr(value, 'item') else value
+        for key, value in mapping.items()
+    }
+
+
+# Alert templates are compiled once at import; each send only renders them
+_HTML_ENV = Environment(autoescape=True, keep_trailing_newline=True)
+_TEXT_ENV = Environment(keep_trailing_newline=True)
+
+_EMAIL_HTML_SRC = """
 <!DOCTYPE html>
 <html>
 <head>
     <style>
-        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-        .header {{ background: linear-gradient(135deg, #dc3545 0%, #c82333 100%); 
-                   color: white; padding: 20px; text-align: center; border-radius: 8px 8px 0 0; }}
-        .content {{ background: #f8f9fa; padding: 30px; border-radius: 0 0 8px 8px; }}
-        .alert-box {{ background: #fff3cd; border-left: 4px solid #ffc107; padding: 15px; margin: 20px 0; }}
-        .metrics {{ background: white; padding: 15px; margin: 15px 0; border-radius: 5px; }}
-        .metric-item {{ display: flex; justify-content: space-between; padding: 8px 0; border-bottom: 1px solid #eee; }}
-        .action-button {{ background: #dc3545; color: white; padding: 12px 30px; 
-                         text-decoration: none; border-radius: 5px; display: inline-block; margin-top: 20px; }}
-        .footer {{ text-align: center; color: #6c757d; margin-top: 20px; font-size: 12px; }}
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        .header { background: linear-gradient(135deg, #dc3545 0%, #c82333 100%); 
+                   color: white; padding: 20px; text-align: center; border-radius: 8px 8px 0 0; }
+        .content { background: #f8f9fa; padding: 30px; border-radius: 0 0 8px 8px; }
+        .alert-box { background: #fff3cd; border-left: 4px solid #ffc107; padding: 15px; margin: 20px 0; }
+        .metrics { background: white; padding: 15px; margin: 15px 0; border-radius: 5px; }
+        .metric-item { display: flex; justify-content: space-between; padding: 8px 0; border-bottom: 1px solid #eee; }
+        .action-button { background: #dc3545; color: white; padding: 12px 30px; 
+                         text-decoration: none; border-radius: 5px; display: inline-block; margin-top: 20px; }
+        .footer { text-align: center; color: #6c757d; margin-top: 20px; font-size: 12px; }
     </style>
 </head>
 <body>
@@ -189,7 +91,7 @@ class NotificationService:
             <p><strong>Dear Parent/Guardian,</strong></p>
             
             <p>This is an automated alert from the Student Risk Prediction System regarding 
-            <strong>{student_data['name']}</strong> (ID: {student_data.get('student_id', 'N/A')}).</p>
+            <strong>{{ name }}</strong> (ID: {{ student_id }}).</p>
             
             <div class="alert-box">
                 <h3 style="margin-top: 0; color: #dc3545;">⚠️ HIGH RISK STATUS DETECTED</h3>
@@ -201,19 +103,19 @@ class NotificationService:
             <div class="metrics">
                 <div class="metric-item">
                     <span>Attendance Rate:</span>
-                    <strong style="color: {'#dc3545' if student_data.get('attendance', 0) < 60 else '#ffc107'}">{student_data.get('attendance', 0)}%</strong>
+                    <strong style="color: {{ attendance_color }}">{{ attendance }}%</strong>
                 </div>
                 <div class="metric-item">
                     <span>Average Score:</span>
-                    <strong style="color: {'#dc3545' if student_data.get('average_score', 0) < 50 else '#ffc107'}">{student_data.get('average_score', 0)}%</strong>
+                    <strong style="color: {{ score_color }}">{{ average_score }}%</strong>
                 </div>
                 <div class="metric-item">
                     <span>Engagement Score:</span>
-                    <strong style="color: {'#dc3545' if student_data.get('engagement_score', 0) < 40 else '#ffc107'}">{student_data.get('engagement_score', 0)}%</strong>
+                    <strong style="color: {{ engagement_color }}">{{ engagement_score }}%</strong>
                 </div>
                 <div class="metric-item">
                     <span>Assignments Completed:</span>
-                    <strong>{student_data.get('assignments_submitted', 0)}/{student_data.get('total_assignments', 0)}</strong>
+                    <strong>{{ assignments_submitted }}/{{ total_assignments }}</strong>
                 </div>
             </div>
             
@@ -236,32 +138,40 @@ class NotificationService:
             
             <div class="footer">
                 <p>This is an automated message from the Student Risk Prediction System.<br>
-                Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>
+                Generated on {{ now }}</p>
             </div>
         </div>
     </div>
 </body>
 </html>
 """
-    
-    def _generate_email_text(self, student_data):
-        """Generate plain text email content"""
-        return f"""
+
+# Only the middle of the HTML alert varies per student. The static head
+# (including the CSS) and tail are UTF-8 encoded once, and the message body
+# is sent as 8bit so no transfer encoding is applied per send (except to
+# servers without 8BITMIME, see _send_message).
+_head_end = _EMAIL_HTML_SRC.rindex('\n', 0, _EMAIL_HTML_SRC.index('{{')) + 1
+_tail_start = _EMAIL_HTML_SRC.index('\n', _EMAIL_HTML_SRC.rindex('}}'))
+_EMAIL_HTML_HEAD = _EMAIL_HTML_SRC[:_head_end].encode('utf-8')
+_EMAIL_BODY_TMPL = _HTML_ENV.from_string(_EMAIL_HTML_SRC[_head_end:_tail_start])
+_EMAIL_HTML_TAIL = _EMAIL_HTML_SRC[_tail_start:].encode('utf-8')
+
+_TEXT_TMPL = _TEXT_ENV.from_string("""
 URGENT ACADEMIC ALERT
 
 Dear Parent/Guardian,
 
-This is an automated alert regarding {student_data['name']} (ID: {student_data.get('student_id', 'N/A')}).
+This is an automated alert regarding {{ name }} (ID: {{ student_id }}).
 
 *** HIGH RISK STATUS DETECTED ***
 
 Our system has identified that your child is currently at HIGH RISK of academic failure.
 
 Current Performance:
-- Attendance: {student_data.get('attendance', 0)}%
-- Average Score: {student_data.get('average_score', 0)}%
-- Engagement: {student_data.get('engagement_score', 0)}%
-- Assignments: {student_data.get('assignments_submitted', 0)}/{student_data.get('total_assignments', 0)}
+- Attendance: {{ attendance }}%
+- Average Score: {{ average_score }}%
+- Engagement: {{ engagement_score }}%
+- Assignments: {{ assignments_submitted }}/{{ total_assignments }}
 
 IMMEDIATE ACTIONS REQUIRED:
 1. Schedule meeting with academic advisor (within 3 days)
@@ -271,15 +181,359 @@ IMMEDIATE ACTIONS REQUIRED:
 
 Please contact the school administration immediately.
 
-Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}
-"""
+Generated: {{ now }}
+""")
+
+_SMS_TMPL = _TEXT_ENV.from_string(
+    "URGENT ALERT: {{ name }} is at HIGH RISK academically. "
+    "Attendance: {{ attendance }}%, "
+    "Score: {{ average_score }}%. "
+    "Please contact school immediately. View details: http://localhost:5000"
+)
+
+
+def _load_twilio():
+    """Import the Twilio REST client class"""
+    global TwilioClient
+    if TwilioClient is None:
+        from twilio.rest import Client as TwilioClient
+    return TwilioClient
+
+
+class NotificationService:
+    _EMAIL_TYPES = frozenset({'email', 'both'})
+    _SMS_TYPES = frozenset({'sms', 'both'})
+    
+    def __init__(self):
+        """Initialize notification service"""
+        self._log_path = 'data/notification_log.jsonl'
+        self._log_fp = None  # opened for appending on the first logged alert
+        self._log_lock = threading.Lock()  # bulk sends log from worker threads
+        self._timestamp_cache = (0, '')  # (minute, formatted footer timestamp)
+        os.makedirs(os.path.dirname(self._log_path), exist_ok=True)
+        self.reload_config()
+    
+    def reload_config(self):
+        """Read SMTP, Twilio and SendGrid settings from the environment"""
+        # Settings are read once here instead of on every send
+        self._smtp = SimpleNamespace(
+            server=os.getenv('SMTP_SERVER'),
+            port=int(os.getenv('SMTP_PORT') or 587),
+            user=os.getenv('SMTP_USERNAME'),
+            pw=os.getenv('SMTP_PASSWORD'),
+            from_addr=os.getenv('FROM_EMAIL') or os.getenv('SMTP_USERNAME')
+        )
+        # make_msgid would otherwise resolve the local FQDN for every message
+        self._smtp.msgid_domain = (self._smtp.from_addr or '').rpartition('@')[2] or None
+        self._twilio = SimpleNamespace(
+            sid=os.getenv('TWILIO_ACCOUNT_SID'),
+            token=os.getenv('TWILIO_AUTH_TOKEN'),
+            from_phone=os.getenv('TWILIO_PHONE_NUMBER')
+        )
+        self._esp = SimpleNamespace(
+            api_key=os.getenv('SENDGRID_API_KEY'),
+            template_id=os.getenv('SENDGRID_TEMPLATE_ID')
+        )
+        # Clients built from the previous settings are rebuilt on next use
+        self._esp_session = None
+        self._twilio_client = None
+        
+        self.email_enabled = self._check_email_config()
+        self.sms_enabled = self._check_sms_config()
+        self.esp_enabled = self._check_esp_config()
+        
+    def _check_email_config(self):
+        """Check if email configuration is available"""
+        return all([
+            self._smtp.server,
+            os.getenv('SMTP_PORT'),
+            self._smtp.user,
+            self._smtp.pw
+        ])
+    
+    def _check_sms_config(self):
+        """Check if SMS configuration is available (Twilio)"""
+        return all([
+            self._twilio.sid,
+            self._twilio.token,
+            self._twilio.from_phone
+        ])
+    
+    def _check_esp_config(self):
+        """Check if batch sending through SendGrid is configured"""
+        return all([
+            self._esp.api_key,
+            self._esp.template_id
+        ])
+    
+    def send_high_risk_alert(self, student_data, parent_contact, alert_type='email'):
+        """Send high risk alert to parent/guardian (queued when Celery is configured)"""
+        if send_alert_task is not None:
+            send_alert_task.delay(_native(student_data), _native(parent_contact), alert_type)
+            return True
+        return self._send_high_risk_alert_sync(student_data, parent_contact, alert_type)
+    
+    def _send_high_risk_alert_sync(self, student_data, parent_contact, alert_type='email',
+                                   raise_smtp_errors=False):
+        """Send high risk alert to parent/guardian in the current process
+        
+        With raise_smtp_errors, SMTP error replies propagate instead of being
+        logged as a failure, so the Celery task can decide whether to retry.
+        """
+        logger.debug("send_high_risk_alert alert_type=%s email_enabled=%s student_data=%s parent_contact=%s",
+                     alert_type, self.email_enabled, student_data, parent_contact)
+        
+        if not student_data or 'name' not in student_data:
+            logger.error("Invalid student_data: missing 'name' key")
+            return False
+        
+        success = False
+        smtp_error = None
+        email_addr = parent_contact.get('email')
+        phone = parent_contact.get('phone')
+        
+        if alert_type in self._EMAIL_TYPES:
+            if self.email_enabled and email_addr:
+                logger.debug("Sending actual email to %s", email_addr)
+                try:
+                    success = self._send_email_alert(student_data, email_addr, raise_smtp_errors)
+                except smtplib.SMTPResponseException as e:
+                    # Held back until the SMS below has gone out, so surfacing
+                    # an SMTP error never drops the other channel
+                    smtp_error = e
+            else:
+                email_addr = email_addr or 'parent@example.com'
+                logger.debug("Simulating email to %s", email_addr)
+                success = self._simulate_email_alert(student_data, email_addr)
+            logger.debug("Email result: %s", success)
+        
+        if alert_type in self._SMS_TYPES:
+            if self.sms_enabled and phone:
+                sms_success = self._send_sms_alert(student_data, phone)
+            else:
+                sms_success = self._simulate_sms_alert(student_data, phone or '+1234567890')
+            logger.debug("SMS result: %s", sms_success)
+            
+            # Only update success if this is the primary alert type or if both are being processed
+            if alert_type == 'sms' or (alert_type == 'both' and success):
+                success = sms_success
+        
+        if smtp_error is not None:
+            # The caller retries or records the email; only the finished SMS is logged here
+            if alert_type == 'both':
+                self._log_notification(student_data, parent_contact, 'sms', sms_success)
+            raise smtp_error
+        
+        # Log the notification
+        self._log_notification(student_data, parent_contact, alert_type, success)
+        logger.debug("Final success result: %s", success)
+        
+        return success
+    
+    def _send_email_alert(self, student_data, parent_email, raise_smtp_errors=False, rich=True):
+        """Send actual email alert (requires SMTP configuration)"""
+        try:
+            # Send email
+            with self._open_smtp() as server:
+                self._send_message(server, self._build_email(student_data, parent_email, rich=rich))
+            
+            logger.info("Email sent to %s", parent_email)
+            return True
+            
+        except smtplib.SMTPResponseException as e:
+            if raise_smtp_errors:
+                raise
+            logger.error("Failed to send email: %s", e)
+            return False
+        except Exception as e:
+            logger.error("Failed to send email: %s", e)
+            return False
+    
+    def _open_smtp(self):
+        """Open an SMTP connection that has completed STARTTLS and login"""
+        smtp = self._smtp
+        server = smtplib.SMTP(smtp.server, smtp.port)
+        try:
+            server.starttls()
+            server.login(smtp.user, smtp.pw)
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    def _new_email(self, rich=True):
+        """Empty alert message; a batch refills one of these for every parent
+        
+        A rich message is multipart/alternative with an HTML part; otherwise
+        the message is a single plain-text part.
+        """
+        msg = EmailMessage()
+        msg['Subject'] = ''
+        msg['From'] = self._smtp.from_addr
+        msg['To'] = ''
+        msg['Message-ID'] = ''
+        if rich:
+            msg.add_alternative('', subtype='html')
+            msg['MIME-Version'] = '1.0'  # add_alternative only sets it on the part
+        return msg
+    
+    def _build_email(self, student_data, parent_email, now=None, msg=None, rich=True):
+        """Fill in the alert message for one parent (a fresh one unless msg is given)"""
+        if msg is None:
+            msg = self._new_email(rich)
+        msg.replace_header('Subject', f"URGENT: Academic Alert for {student_data['name']}")
+        msg.replace_header('To', parent_email)
+        # A fresh ID per recipient, also when a batch message is refilled;
+        # mail without one is more likely to be greylisted
+        msg.replace_header('Message-ID', make_msgid(domain=self._smtp.msgid_domain))
+        
+        # Email body
+        if not rich:
+            msg.set_content(self._generate_email_text(student_data, now), cte='8bit')
+            return msg
+        msg.get_payload()[0].set_content(
+            self._render_html_bytes(student_data, now), 'text', 'html',
+            cte='8bit', params={'charset': 'utf-8'}
+        )
+        return msg
+    
+    def _send_message(self, server, msg):
+        """Send over an open connection, declaring the 8bit body when the server supports it
+        
+        A server without 8BITMIME only accepts 7-bit data, so the body parts
+        are re-encoded as quoted-printable for it.
+        """
+        if server.has_extn('8bitmime'):
+            server.send_message(msg, mail_options=('BODY=8BITMIME',))
+            return
+        for part in msg.walk():
+            if part['Content-Transfer-Encoding'] == '8bit':
+                part.set_content(part.get_content(), subtype=part.get_content_subtype(),
+                                 cte='quoted-printable')
+        server.send_message(msg)
+    
+    def _send_one_over(self, server, student_data, parent_email, now=None, msg=None, rich=True):
+        """Send one alert over an open connection; returns the connection to keep using"""
+        msg = self._build_email(student_data, parent_email, now, msg, rich)
+        try:
+            self._send_message(server, msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped the connection mid-batch; reconnect once
+            server.close()
+            server = self._open_smtp()
+            try:
+                self._send_message(server, msg)
+            except Exception:
+                server.close()
+                raise
+        # The email is already delivered, so a failed RSET must not report it
+        # as failed; a dropped connection is replaced by the next send
+        try:
+            server.rset()
+        except (smtplib.SMTPException, OSError) as e:
+            logger.debug("RSET after delivery failed: %s", e)
+        return server
+    
+    def build_email_preview(self, student_data, parent_email, now=None):
+        """Plain-text rendering of the alert email, as shown when SMTP is not configured"""
+        return "\n".join([
+            "\n" + "="*70,
+            "EMAIL ALERT SIMULATION",
+            "="*70,
+            f"To: {parent_email}",
+            f"Subject: URGENT: Academic Alert for {student_data['name']}",
+            "-"*70,
+            self._generate_email_text(student_data, now),
+            "="*70 + "\n"
+        ])
+    
+    def _simulate_email_alert(self, student_data, parent_email):
+        """Simulate email alert for demo (when SMTP not configured)"""
+        print(self.build_email_preview(student_data, parent_email))
+        return True
+    
+    def _send_sms_alert(self, student_data, parent_phone):
+        """Send actual SMS alert using Twilio"""
+        try:
+            client = self._get_twilio()
+            
+            message_body = self._generate_sms_text(student_data)
+            
+            message = client.messages.create(
+                body=message_body,
+                from_=self._twilio.from_phone,
+                to=parent_phone
+            )
+            
+            logger.info("SMS sent to %s (SID: %s)", parent_phone, message.sid)
+            return True
+            
+        except Exception as e:
+            logger.error("Failed to send SMS: %s", e)
+            return False
+    
+    def _get_twilio(self):
+        """Twilio client reused across sends so its HTTP connections stay open"""
+        if self._twilio_client is None:
+            self._twilio_client = _load_twilio()(self._twilio.sid, self._twilio.token)
+        return self._twilio_client
+    
+    def _simulate_sms_alert(self, student_data, parent_phone):
+        """Simulate SMS alert for demo (when Twilio not configured)"""
+        print("\n" + "="*70)
+        print("SMS ALERT SIMULATION")
+        print("="*70)
+        print(f"To: {parent_phone}")
+        print("-"*70)
+        print(self._generate_sms_text(student_data))
+        print("="*70 + "\n")
+        return True
+    
+    def _now_str(self):
+        """Timestamp shown in the footer of an alert, formatted at most once per minute"""
+        minute = int(time.time()) // 60
+        cached_minute, formatted = self._timestamp_cache
+        if minute != cached_minute:
+            formatted = datetime.fromtimestamp(minute * 60).strftime('%B %d, %Y at %I:%M %p')
+            self._timestamp_cache = (minute, formatted)
+        return formatted
+    
+    def _template_context(self, student_data):
+        """Values substituted into the alert templates, each looked up once"""
+        get = student_data.get
+        attendance = get('attendance', 0)
+        average_score = get('average_score', 0)
+        engagement_score = get('engagement_score', 0)
+        return {
+            'name': student_data['name'],
+            'student_id': get('student_id', 'N/A'),
+            'attendance': attendance,
+            'attendance_color': '#dc3545' if attendance < 60 else '#ffc107',
+            'average_score': average_score,
+            'score_color': '#dc3545' if average_score < 50 else '#ffc107',
+            'engagement_score': engagement_score,
+            'engagement_color': '#dc3545' if engagement_score < 40 else '#ffc107',
+            'assignments_submitted': get('assignments_submitted', 0),
+            'total_assignments': get('total_assignments', 0)
+        }
+    
+    def _generate_email_template(self, student_data, now=None):
+        """Generate HTML email template"""
+        return self._render_html_bytes(student_data, now).decode('utf-8')
+    
+    def _render_html_bytes(self, student_data, now=None):
+        """HTML alert as UTF-8 bytes; only the student-specific middle is rendered"""
+        body = _EMAIL_BODY_TMPL.render(self._template_context(student_data), now=now or self._now_str())
+        return _EMAIL_HTML_HEAD + body.encode('utf-8') + _EMAIL_HTML_TAIL
+    
+    def _generate_email_text(self, student_data, now=None):
+        """Generate plain text email content"""
+        return _TEXT_TMPL.render(self._template_context(student_data), now=now or self._now_str())
     
     def _generate_sms_text(self, student_data):
         """Generate SMS message (160 characters limit aware)"""
-        return (f"URGENT ALERT: {student_data['name']} is at HIGH RISK academically. "
-                f"Attendance: {student_data.get('attendance', 0)}%, "
-                f"Score: {student_data.get('average_score', 0)}%. "
-                f"Please contact school immediately. View details: http://localhost:5000")
+        # The SMS has no timestamp, so it skips formatting one
+        return _SMS_TMPL.render(self._template_context(student_data))
     
     def _log_notification(self, student_data, parent_contact, alert_type, success):
         """Log notification for tracking"""
@@ -292,54 +546,229 @@ Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}
             'success': success,
             'risk_level': student_data.get('risk_level', 'High Risk')
         }
-        self.notification_log.append(log_entry)
-        
-        # Save to file
-        self._save_notification_log()
+        self._append_log(log_entry)
     
-    def _save_notification_log(self):
-        """Save notification log to file"""
+    def _append_log(self, log_entry):
+        """Append one entry to the JSON Lines notification log"""
         try:
-            log_file = 'data/notification_log.json'
-            os.makedirs(os.path.dirname(log_file), exist_ok=True)
-            
-            with open(log_file, 'w') as f:
-                json.dump(self.notification_log, f, indent=2)
+            if orjson is not None:
+                line = orjson.dumps(log_entry, option=orjson.OPT_APPEND_NEWLINE).decode('utf-8')
+            else:
+                line = json.dumps(log_entry) + "\n"
+            with self._log_lock:
+                if self._log_fp is None:
+                    # Line-buffered, so every entry reaches the file as soon as its newline is written
+                    self._log_fp = open(self._log_path, 'a', encoding='utf-8', buffering=1)
+                self._log_fp.write(line)
         except Exception as e:
-            print(f"[WARNING] Could not save notification log: {e}")
+            logger.warning("Could not save notification log: %s", e)
+    
+    def _iter_log(self):
+        """Stream logged notifications from the log file, oldest first"""
+        try:
+            loads = orjson.loads if orjson is not None else json.loads
+            with open(self._log_path, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        yield loads(line)
+        except FileNotFoundError:
+            return
     
     def get_notification_history(self, student_id=None):
         """Get notification history, optionally filtered by student"""
         if student_id:
-            return [log for log in self.notification_log if log['student_id'] == student_id]
-        return self.notification_log
+            return [log for log in self._iter_log() if log['student_id'] == student_id]
+        return list(self._iter_log())
+    
+    def send_bulk_alerts(self, high_risk_students, rich=False):
+        """Send alerts to all high-risk students' parents
+        
+        Emails sent over SMTP from this process are plain text unless rich=True
+        asks for the HTML version; the text body is about an eighth of the size.
+        """
+        if send_alert_task is not None:
+            # Fan the alerts out to the workers as one group
+            group_result = group(
+                send_alert_task.s(_native(student), _native(student.get('parent_contact', {})), 'email')
+                for student in high_risk_students
+            ).apply_async()
+            return [
+                {'student': student['name'], 'success': True, 'task_id': task.id}
+                for student, task in zip(high_risk_students, group_result.results)
+            ]
+        
+        if self.esp_enabled and len(high_risk_students) > 1:
+            return self._send_bulk_via_esp(high_risk_students)
+        
+        if not high_risk_students:
+            return []
+        
+        # Each worker sends a contiguous slice over its own SMTP connection;
+        # concatenating the slices keeps results in input order
+        now = self._now_str()  # every alert in the run carries the same timestamp
+        workers = min(_MAX_SMTP_CONNECTIONS, len(high_risk_students))
+        size = math.ceil(len(high_risk_students) / workers)
+        chunks = [high_risk_students[i:i + size] for i in range(0, len(high_risk_students), size)]
+        
+        results, previews = [], []
+        with ThreadPoolExecutor(max_workers=len(chunks), thread_name_prefix='alerts') as executor:
+            for chunk_results, chunk_previews in executor.map(lambda chunk: self._send_chunk(chunk, now, rich), chunks):
+                results.extend(chunk_results)
+                previews.extend(chunk_previews)
+        self._write_previews(previews)
+        return results
+    
+    def _write_previews(self, previews):
+        """Print the simulated emails of a bulk run in one write"""
+        if previews:
+            sys.stdout.write("\n".join(previews) + "\n")
+    
+    def _simulate_in_batch(self, student, parent_contact, now, previews):
+        """Simulate one email of a bulk run, collecting its preview for later output"""
+        previews.append(self.build_email_preview(student, parent_contact.get('email') or 'parent@example.com', now))
+        self._log_notification(student, parent_contact, 'email', True)
+        return True
+    
+    def _send_chunk(self, students, now, rich):
+        """Send alerts for a slice of a bulk run over one shared SMTP connection"""
+        results, previews = [], []
+        server = None  # opened lazily, only if a real email has to go out
+        msg = self._new_email(rich)  # one message per worker, refilled for each parent
+        
+        try:
+            for student in students:
+                parent_contact = student.get('parent_contact', {})
+                parent_email = parent_contact.get('email')
+                
+                if self.email_enabled and parent_email:
+                    try:
+                        # Kept in server before the send, so a failed first send still gets it closed
+                        if server is None:
+                            server = self._open_smtp()
+                        server = self._send_one_over(server, student, parent_email, now, msg, rich)
+                        logger.info("Email sent to %s", parent_email)
+                        result = True
+                    except Exception as e:
+                        logger.error("Failed to send email: %s", e)
+                        result = False
+                    self._log_notification(student, parent_contact, 'email', result)
+                else:
+                    result = self._simulate_in_batch(student, parent_contact, now, previews)
+                results.append({
+                    'student': student['name'],
+                    'success': result
+                })
+        finally:
+            if server is not None:
+                try:
+                    server.quit()
+                except (smtplib.SMTPException, OSError):
+                    pass
+        
+        return results, previews
     
-    def send_bulk_alerts(self, high_risk_students):
-        """Send alerts to all high-risk students' parents"""
-        results = []
+    def _send_bulk_via_esp(self, high_risk_students):
+        """Email every parent with a single ESP request; the rest are simulated"""
+        with_email = [s for s in high_risk_students if s.get('parent_contact', {}).get('email')]
+        batch_success = self._send_batch_via_esp(with_email) if with_email else True
         
+        results, previews = [], []
+        now = self._now_str()
         for student in high_risk_students:
-            result = self.send_high_risk_alert(
-                student_data=student,
-                parent_contact=student.get('parent_contact', {}),
-                alert_type='email'  # Can be configured
-            )
+            parent_contact = student.get('parent_contact', {})
+            if parent_contact.get('email'):
+                result = batch_success
+                self._log_notification(student, parent_contact, 'email', result)
+            else:
+                result = self._simulate_in_batch(student, parent_contact, now, previews)
             results.append({
                 'student': student['name'],
                 'success': result
             })
-        
+        self._write_previews(previews)
         return results
+    
+    def _send_batch_via_esp(self, students):
+        """Send all alerts in one SendGrid call using a dynamic template"""
+        # SendGrid accepts at most 1000 personalizations per request
+        from_email = self._smtp.from_addr
+        session = self._get_esp_session()
+        try:
+            for start in range(0, len(students), 1000):
+                payload = {
+                    'from': {'email': from_email},
+                    'template_id': self._esp.template_id,
+                    'personalizations': [
+                        {
+                            'to': [{'email': s['parent_contact']['email']}],
+                            'dynamic_template_data': {
+                                'name': s['name'],
+                                'student_id': s.get('student_id', 'N/A'),
+                                'attendance': s.get('attendance', 0),
+                                'average_score': s.get('average_score', 0),
+                                'engagement_score': s.get('engagement_score', 0),
+                                'assignments_submitted': s.get('assignments_submitted', 0),
+                                'total_assignments': s.get('total_assignments', 0)
+                            }
+                        }
+                        for s in students[start:start + 1000]
+                    ]
+                }
+                response = session.post('https://api.sendgrid.com/v3/mail/send', json=payload, timeout=30)
+                response.raise_for_status()
+            logger.info("Batch email sent to %d parents", len(students))
+            return True
+        except Exception as e:
+            logger.error("Failed to send batch email: %s", e)
+            return False
+    
+    def _get_esp_session(self):
+        """Keep-alive HTTP session for the ESP API"""
+        if self._esp_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            self._esp_session = requests.Session()
+            self._esp_session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            self._esp_session.headers['Authorization'] = f"Bearer {self._esp.api_key}"
+        return self._esp_session
+
+
+if celery_app is not None:
+    @celery_app.task(bind=True, max_retries=5, default_retry_delay=30)
+    def send_alert_task(self, student_data, parent_contact, alert_type):
+        """Worker-side alert delivery; the email is retried on soft SMTP failures"""
+        service = get_notification_service()
+        try:
+            return service._send_high_risk_alert_sync(
+                student_data, parent_contact, alert_type, raise_smtp_errors=True
+            )
+        except smtplib.SMTPResponseException as e:
+            # 4xx is a soft failure (greylisting, throttling): back off from a
+            # minute up to an hour. 5xx is a hard bounce and is not retried.
+            # Any SMS has already gone out, so a retry resends the email alone.
+            if 400 <= e.smtp_code < 500 and self.request.retries < self.max_retries:
+                raise self.retry(args=(student_data, parent_contact, 'email'), exc=e,
+                                 countdown=min(60 * 2 ** self.request.retries, 3600))
+            logger.error("Failed to send email: %s", e)
+            service._log_notification(student_data, parent_contact, 'email', False)
+            return False
+else:
+    send_alert_task = None
 
 
 # Singleton instance
 _notification_service = None
+_notification_service_lock = threading.Lock()
 
 def get_notification_service():
     """Get or create notification service instance"""
     global _notification_service
     if _notification_service is None:
-        _notification_service = NotificationService()
+        # Double-checked so concurrent first requests build only one service
+        with _notification_service_lock:
+            if _notification_service is None:
+                _notification_service = NotificationService()
     return _notification_service
 
 
@@ -3,62 +3,215 @@ PDF Report Generator for Student Risk Assessment
 Generates comprehensive reports with AI suggestions
 """
 
+import os
+
+from reportlab import rl_config
+
+# Attribute validation on reportlab shapes only helps while developing; it has
+# to be switched off before any reportlab.graphics module is imported
+if not os.getenv('REPORTLAB_DEBUG'):
+    rl_config.shapeChecking = 0
+
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from reportlab.pdfbase import pdfmetrics
 from datetime import datetime
-import os
+from functools import lru_cache
+import hashlib
+import json
+import logging
+import shutil
+import uuid
+from itertools import islice
+from xml.sax.saxutils import escape
+
+
+logger = logging.getLogger(__name__)
+
+# Load the standard fonts' metrics at import so the first report doesn't pay
+# for them; the only fonts used are Helvetica and its <b>/<i> variants
+for _font_name in ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique'):
+    pdfmetrics.getFont(_font_name)
+del _font_name
+
+
+# Palette shared by the table and paragraph styles
+_C_NAVY = colors.HexColor('#2c3e50')
+_C_RED = colors.HexColor('#dc3545')
+_C_AMBER = colors.HexColor('#ffc107')
+_C_GREEN = colors.HexColor('#28a745')
+_C_LIGHT = colors.HexColor('#f8f9fa')
+_C_DARK = colors.HexColor('#343a40')
+
+# Table styles are built once and shared by every report
+_STUDENT_INFO_TS = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), _C_LIGHT),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey)
+])
+
+_METRICS_TS = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), _C_NAVY),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+_CONTACT_TS = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), _C_LIGHT),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey)
+])
+
+_BULK_SUMMARY_TS = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), _C_NAVY),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('FONTSIZE', (0, 1), (-1, -1), 8)
+])
+
+_SENTIMENT_META_TS = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), _C_LIGHT),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+])
+
+_SENTIMENT_STATS_TS = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), _C_DARK),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [_C_LIGHT, colors.white]),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+_SENTIMENT_ALERT_TS = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), _C_DARK),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [_C_LIGHT, colors.white]),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+# Bulk report rows are 18pt high, so an A4 page holds 40 under the header
+# (the first page 33, below the title); the counts leave a few rows' slack
+_BULK_HEADER = ['ID', 'Name', 'Attendance', 'Score', 'Engagement', 'Risk']
+_BULK_FIRST_PAGE_ROWS = 30
+_BULK_ROWS_PER_PAGE = 38
+
+# Seconds a cached student report is kept. Cache keys include the minute the
+# report was generated, so older entries are never hit again.
+_CACHE_MAX_AGE = 120
+
+# Paragraph style for each risk level banner; anything else renders as safe
+_RISK_STYLES = {'High Risk': 'RiskHigh', 'Medium Risk': 'RiskMedium'}
+
+
+def _build_bulk_row(student):
+    """Summary table row for one student in a bulk report"""
+    get = student.get
+    return [
+        get('StudentID', 'N/A'),
+        get('Name', 'N/A'),
+        f"{get('Attendance', 0)}%",
+        f"{get('AverageScore', 0)}%",
+        f"{get('EngagementScore', 0)}%",
+        get('RiskLevel', 'Unknown')
+    ]
+
+
+@lru_cache(maxsize=None)
+def _build_styles():
+    """Sample stylesheet plus the report's custom styles, built once per process"""
+    styles = getSampleStyleSheet()
+    
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=_C_NAVY,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='RiskHigh',
+        parent=styles['Normal'],
+        fontSize=16,
+        textColor=_C_RED,
+        fontName='Helvetica-Bold',
+        alignment=TA_CENTER
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='RiskMedium',
+        parent=styles['Normal'],
+        fontSize=16,
+        textColor=_C_AMBER,
+        fontName='Helvetica-Bold',
+        alignment=TA_CENTER
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='RiskSafe',
+        parent=styles['Normal'],
+        fontSize=16,
+        textColor=_C_GREEN,
+        fontName='Helvetica-Bold',
+        alignment=TA_CENTER
+    ))
+    return styles
 
 
 class ReportGenerator:
+    _dirs_created = False  # set once the output directories exist
+    
     def __init__(self):
         """Initialize report generator"""
-        self.reports_dir = 'reports'
-        os.makedirs(self.reports_dir, exist_ok=True)
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        self.reports_dir = os.path.abspath('reports')
+        self._report_prefix = os.path.join(self.reports_dir, 'Student_Report_')
+        self._bulk_prefix = os.path.join(self.reports_dir, 'Bulk_Report_')
+        # Student reports keyed by a hash of their inputs, reused on re-export
+        self.cache_dir = os.path.join(self.reports_dir, 'cache')
+        if not ReportGenerator._dirs_created:
+            self.ensure_dirs(self.cache_dir)
+        # Shared by every generator; the styles are never modified after this
+        self.styles = _build_styles()
     
-    def _setup_custom_styles(self):
-        """Setup custom paragraph styles"""
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#2c3e50'),
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='RiskHigh',
-            parent=self.styles['Normal'],
-            fontSize=16,
-            textColor=colors.HexColor('#dc3545'),
-            fontName='Helvetica-Bold',
-            alignment=TA_CENTER
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='RiskMedium',
-            parent=self.styles['Normal'],
-            fontSize=16,
-            textColor=colors.HexColor('#ffc107'),
-            fontName='Helvetica-Bold',
-            alignment=TA_CENTER
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='RiskSafe',
-            parent=self.styles['Normal'],
-            fontSize=16,
-            textColor=colors.HexColor('#28a745'),
-            fontName='Helvetica-Bold',
-            alignment=TA_CENTER
-        ))
+    @classmethod
+    def ensure_dirs(cls, cache_dir=os.path.join('reports', 'cache')):
+        """Create the reports and cache directories once per process"""
+        os.makedirs(cache_dir, exist_ok=True)
+        cls._dirs_created = True
     
     def generate_student_report(self, student_data, prediction_data, ai_suggestions, top_features):
         """
@@ -72,11 +225,40 @@ class ReportGenerator:
         
         Returns:
             Path to generated PDF file
+        
+        A report whose inputs and "Report Generated" time (to the minute, as
+        printed) match an earlier one is copied from the cache instead of
+        being rebuilt, so a reused report never shows a stale time.
         """
+        # Read every field once
+        get = student_data.get
+        student_id = get('StudentID', 'N/A')
+        student_email = get('StudentEmail', 'N/A')
+        attendance = get('Attendance', 0)
+        average_score = get('AverageScore', 0)
+        engagement = get('EngagementScore', 0)
+        submitted = get('AssignmentsSubmitted', 0)
+        total = get('TotalAssignments', 0)
+        
         # Create filename
-        student_id = student_data.get('StudentID', 'UNKNOWN')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{self.reports_dir}/Student_Report_{student_id}_{timestamp}.pdf"
+        now = datetime.now()  # one clock read for the filename and the header
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
+        filename = f"{self._report_prefix}{get('StudentID', 'UNKNOWN')}_{timestamp}.pdf"
+        generated_at = now.strftime('%B %d, %Y at %I:%M %p')
+        
+        cache_key = hashlib.blake2b(
+            json.dumps([student_data, prediction_data, ai_suggestions, top_features, generated_at],
+                       sort_keys=True, default=str).encode('utf-8'),
+            digest_size=16
+        ).hexdigest()
+        cached_path = os.path.join(self.cache_dir, f"{cache_key}.pdf")
+        
+        if os.path.exists(cached_path):
+            self._link_or_copy(cached_path, filename)
+            logger.info("Report reused from cache: %s", filename)
+            return filename
+        
+        self._evict_cache(now.timestamp())
         
         # Create PDF document
         doc = SimpleDocTemplate(filename, pagesize=letter,
@@ -92,7 +274,7 @@ class ReportGenerator:
         elements.append(Spacer(1, 12))
         
         # Report metadata
-        report_date = Paragraph(f"<b>Report Generated:</b> {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", 
+        report_date = Paragraph(f"<b>Report Generated:</b> {generated_at}", 
                                self.styles['Normal'])
         elements.append(report_date)
         elements.append(Spacer(1, 20))
@@ -102,22 +284,14 @@ class ReportGenerator:
         elements.append(Spacer(1, 12))
         
         student_info_data = [
-            ['Student ID:', student_data.get('StudentID', 'N/A')],
-            ['Name:', student_data.get('Name', 'N/A')],
-            ['Email:', student_data.get('StudentEmail', 'N/A')],
-            ['Previous Grade:', student_data.get('PreviousGrade', 'N/A')]
+            ['Student ID:', student_id],
+            ['Name:', get('Name', 'N/A')],
+            ['Email:', student_email],
+            ['Previous Grade:', get('PreviousGrade', 'N/A')]
         ]
         
         student_info_table = Table(student_info_data, colWidths=[2*inch, 4*inch])
-        student_info_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f8f9fa')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-        ]))
+        student_info_table.setStyle(_STUDENT_INFO_TS)
         elements.append(student_info_table)
         elements.append(Spacer(1, 20))
         
@@ -126,8 +300,8 @@ class ReportGenerator:
         elements.append(Spacer(1, 12))
         
         risk_level = prediction_data.get('risk_level', 'Unknown')
-        risk_style = 'RiskHigh' if risk_level == 'High Risk' else 'RiskMedium' if risk_level == 'Medium Risk' else 'RiskSafe'
-        risk_para = Paragraph(f"<b>RISK LEVEL: {risk_level.upper()}</b>", self.styles[risk_style])
+        risk_style = _RISK_STYLES.get(risk_level, 'RiskSafe')
+        risk_para = Paragraph(f"<b>RISK LEVEL: {escape(risk_level.upper())}</b>", self.styles[risk_style])
         elements.append(risk_para)
         elements.append(Spacer(1, 12))
         
@@ -142,28 +316,15 @@ class ReportGenerator:
         
         metrics_data = [
             ['Metric', 'Value', 'Status'],
-            ['Attendance Rate', f"{student_data.get('Attendance', 0)}%", 
-             self._get_status(student_data.get('Attendance', 0), 75, 60)],
-            ['Average Score', f"{student_data.get('AverageScore', 0)}%",
-             self._get_status(student_data.get('AverageScore', 0), 70, 50)],
-            ['Engagement Score', f"{student_data.get('EngagementScore', 0)}%",
-             self._get_status(student_data.get('EngagementScore', 0), 60, 40)],
-            ['Assignments Completed', 
-             f"{student_data.get('AssignmentsSubmitted', 0)}/{student_data.get('TotalAssignments', 0)}",
-             self._get_assignment_status(student_data)]
+            ['Attendance Rate', f"{attendance}%", self._get_status(attendance, 75, 60)],
+            ['Average Score', f"{average_score}%", self._get_status(average_score, 70, 50)],
+            ['Engagement Score', f"{engagement}%", self._get_status(engagement, 60, 40)],
+            ['Assignments Completed', f"{submitted}/{total}",
+             self._get_assignment_status(submitted, total)]
         ]
         
         metrics_table = Table(metrics_data, colWidths=[2.5*inch, 1.5*inch, 2*inch])
-        metrics_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        metrics_table.setStyle(_METRICS_TS)
         elements.append(metrics_table)
         elements.append(Spacer(1, 20))
         
@@ -171,19 +332,22 @@ class ReportGenerator:
         elements.append(Paragraph("<b>TOP 3 CONTRIBUTING FACTORS</b>", self.styles['Heading2']))
         elements.append(Spacer(1, 12))
         
-        for i, feature in enumerate(top_features, 1):
-            feature_para = Paragraph(f"{i}. <b>{feature['name']}:</b> {feature['description']}", 
-                                    self.styles['Normal'])
-            elements.append(feature_para)
-            elements.append(Spacer(1, 8))
+        # One paragraph for all factors; a blank line separates them
+        if top_features:
+            features_html = '<br/><br/>'.join(
+                f"{i}. <b>{escape(feature['name'])}:</b> {escape(feature['description'])}"
+                for i, feature in enumerate(top_features, 1)
+            )
+            elements.append(Paragraph(features_html, self.styles['Normal']))
         
-        elements.append(Spacer(1, 20))
+        elements.append(Spacer(1, 28))
         
         # AI-Generated Suggestions
         elements.append(Paragraph("<b>AI-POWERED RECOMMENDATIONS</b>", self.styles['Heading2']))
         elements.append(Spacer(1, 12))
         
-        suggestions_para = Paragraph(ai_suggestions.replace('\n', '<br/>'), self.styles['Normal'])
+        # Suggestions are plain model output; escape them before adding line breaks
+        suggestions_para = Paragraph(escape(ai_suggestions).replace('\n', '<br/>'), self.styles['Normal'])
         elements.append(suggestions_para)
         elements.append(Spacer(1, 20))
         
@@ -192,22 +356,14 @@ class ReportGenerator:
         elements.append(Spacer(1, 12))
         
         contact_data = [
-            ['Student Email:', student_data.get('StudentEmail', 'N/A')],
-            ['Parent Email:', student_data.get('ParentEmail', 'N/A')],
-            ['Parent Phone:', student_data.get('ParentPhone', 'N/A')],
-            ['Teacher Email:', student_data.get('TeacherEmail', 'N/A')]
+            ['Student Email:', student_email],
+            ['Parent Email:', get('ParentEmail', 'N/A')],
+            ['Parent Phone:', get('ParentPhone', 'N/A')],
+            ['Teacher Email:', get('TeacherEmail', 'N/A')]
         ]
         
         contact_table = Table(contact_data, colWidths=[2*inch, 4*inch])
-        contact_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f8f9fa')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-        ]))
+        contact_table.setStyle(_CONTACT_TS)
         elements.append(contact_table)
         elements.append(Spacer(1, 30))
         
@@ -220,13 +376,69 @@ class ReportGenerator:
         footer = Paragraph(footer_text, self.styles['Normal'])
         elements.append(footer)
         
-        # Build PDF
-        doc.build(elements)
+        # Build PDF; it outlives the request in the cache, so make it durable
+        self._build_pdf(doc, elements, fsync=True)
+        self._link_or_copy(filename, cached_path)
         
-        print(f"[OK] Report generated: {filename}")
+        logger.info("Report generated: %s", filename)
         return filename
     
-    def _get_status(self, value, good_threshold, warning_threshold):
+    def _evict_cache(self, now):
+        """Remove cached reports older than _CACHE_MAX_AGE; their keys can no longer match"""
+        try:
+            entries = list(os.scandir(self.cache_dir))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime > _CACHE_MAX_AGE:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                # Another worker evicted it first
+                pass
+    
+    @staticmethod
+    def _link_or_copy(src, dst):
+        """Hard-link src to dst (replacing dst), copying where links are not supported"""
+        part_path = f"{dst}.{uuid.uuid4().hex}.part"
+        try:
+            os.link(src, part_path)
+        except OSError:
+            shutil.copyfile(src, part_path)
+        os.replace(part_path, dst)
+        # rename() is a no-op when dst is already a link to src
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    
+    def _build_pdf(self, doc, flowables, fsync=False):
+        """
+        Build a document into a buffered handle, then move it to doc.filename.
+        With fsync the data is flushed to disk before the rename; otherwise
+        the page cache carries the write.
+        """
+        path = doc.filename
+        # Writing to a new file and renaming it never truncates an existing
+        # report in place (cached reports are hard links to the same data)
+        part_path = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(part_path, 'wb', buffering=4 << 20) as fh:
+                doc.filename = fh
+                doc.build(flowables)
+                if fsync:
+                    fh.flush()
+                    os.fsync(fh.fileno())
+            os.replace(part_path, path)
+        except Exception:
+            # Don't leave a truncated PDF behind
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        finally:
+            doc.filename = path
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _get_status(value, good_threshold, warning_threshold):
         """Get status label based on thresholds"""
         if value >= good_threshold:
             return "Good"
@@ -235,23 +447,17 @@ class ReportGenerator:
         else:
             return "Critical"
     
-    def _get_assignment_status(self, student_data):
+    def _get_assignment_status(self, submitted, total):
         """Get assignment completion status"""
-        submitted = student_data.get('AssignmentsSubmitted', 0)
-        total = student_data.get('TotalAssignments', 1)
-        rate = (submitted / total) * 100
+        rate = (submitted / (total or 1)) * 100
         
-        if rate >= 80:
-            return "Good"
-        elif rate >= 60:
-            return "Warning"
-        else:
-            return "Critical"
+        return self._get_status(rate, 80, 60)
     
     def generate_bulk_report(self, students_data, risk_filter='High Risk'):
         """Generate a summary report for multiple students"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{self.reports_dir}/Bulk_Report_{risk_filter.replace(' ', '_')}_{timestamp}.pdf"
+        now = datetime.now()
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
+        filename = f"{self._bulk_prefix}{risk_filter.replace(' ', '_')}_{timestamp}.pdf"
         
         doc = SimpleDocTemplate(filename, pagesize=A4,
                               rightMargin=50, leftMargin=50,
@@ -260,46 +466,35 @@ class ReportGenerator:
         elements = []
         
         # Title
-        title = Paragraph(f"{risk_filter.upper()} STUDENTS SUMMARY REPORT", self.styles['CustomTitle'])
+        title = Paragraph(f"{escape(risk_filter.upper())} STUDENTS SUMMARY REPORT", self.styles['CustomTitle'])
         elements.append(title)
         elements.append(Spacer(1, 20))
         
         # Report date
-        report_date = Paragraph(f"<b>Generated:</b> {datetime.now().strftime('%B %d, %Y')}", 
+        report_date = Paragraph(f"<b>Generated:</b> {now.strftime('%B %d, %Y')}", 
                                self.styles['Normal'])
         elements.append(report_date)
         elements.append(Spacer(1, 20))
         
-        # Summary table
-        table_data = [['ID', 'Name', 'Attendance', 'Score', 'Engagement', 'Risk']]
-        
-        for student in students_data:
-            table_data.append([
-                student.get('StudentID', 'N/A'),
-                student.get('Name', 'N/A'),
-                f"{student.get('Attendance', 0)}%",
-                f"{student.get('AverageScore', 0)}%",
-                f"{student.get('EngagementScore', 0)}%",
-                student.get('RiskLevel', 'Unknown')
-            ])
-        
-        summary_table = Table(table_data, colWidths=[0.8*inch, 1.5*inch, 1*inch, 1*inch, 1*inch, 1.2*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 8)
-        ]))
-        elements.append(summary_table)
-        
-        doc.build(elements)
-        
-        print(f"[OK] Bulk report generated: {filename}")
+        # Summary table, one page-sized table per page: splitting a single
+        # table across pages re-lays out all remaining rows for every page
+        rows = map(_build_bulk_row, students_data)
+        
+        page_rows = list(islice(rows, _BULK_FIRST_PAGE_ROWS))
+        while True:
+            summary_table = Table([_BULK_HEADER] + page_rows, repeatRows=1,
+                                  colWidths=[0.8*inch, 1.5*inch, 1*inch, 1*inch, 1*inch, 1.2*inch])
+            summary_table.setStyle(_BULK_SUMMARY_TS)
+            elements.append(summary_table)
+            
+            page_rows = list(islice(rows, _BULK_ROWS_PER_PAGE))
+            if not page_rows:
+                break
+            elements.append(PageBreak())
+        
+        self._build_pdf(doc, elements)
+        
+        logger.info("Bulk report generated: %s", filename)
         return filename
 
     def generate_sentiment_report(self, report_data):
@@ -312,27 +507,24 @@ class ReportGenerator:
             story = []
             
             # Title
-            title = Paragraph(report_data['title'], self.styles['CustomTitle'])
+            title = Paragraph(escape(report_data['title']), self.styles['CustomTitle'])
             story.append(title)
             story.append(Spacer(1, 20))
             
+            stats = report_data['statistics']
+            total_alerts = stats['total_alerts']
+            high, medium, low = stats['high_risk_alerts'], stats['medium_risk_alerts'], stats['low_risk_alerts']
+            percent_base = max(total_alerts, 1)
+            
             # Report metadata
             meta_data = [
                 ['Generated Date:', report_data['generated_date']],
                 ['Report Period:', report_data['period']],
-                ['Total Alerts:', str(report_data['statistics']['total_alerts'])]
+                ['Total Alerts:', str(total_alerts)]
             ]
             
             meta_table = Table(meta_data, colWidths=[2*inch, 3*inch])
-            meta_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f8f9fa')),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
+            meta_table.setStyle(_SENTIMENT_META_TS)
             
             story.append(meta_table)
             story.append(Spacer(1, 20))
@@ -343,24 +535,13 @@ class ReportGenerator:
             
             stats_data = [
                 ['Risk Level', 'Count', 'Percentage'],
-                ['High Risk', str(report_data['statistics']['high_risk_alerts']), 
-                 f"{(report_data['statistics']['high_risk_alerts'] / max(report_data['statistics']['total_alerts'], 1) * 100):.1f}%"],
-                ['Medium Risk', str(report_data['statistics']['medium_risk_alerts']), 
-                 f"{(report_data['statistics']['medium_risk_alerts'] / max(report_data['statistics']['total_alerts'], 1) * 100):.1f}%"],
-                ['Low Risk', str(report_data['statistics']['low_risk_alerts']), 
-                 f"{(report_data['statistics']['low_risk_alerts'] / max(report_data['statistics']['total_alerts'], 1) * 100):.1f}%"]
+                ['High Risk', str(high), f"{high / percent_base * 100:.1f}%"],
+                ['Medium Risk', str(medium), f"{medium / percent_base * 100:.1f}%"],
+                ['Low Risk', str(low), f"{low / percent_base * 100:.1f}%"]
             ]
             
             stats_table = Table(stats_data, colWidths=[2*inch, 1*inch, 1.5*inch])
-            stats_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#343a40')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.HexColor('#f8f9fa'), colors.white]),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
+            stats_table.setStyle(_SENTIMENT_STATS_TS)
             
             story.append(stats_table)
             story.append(Spacer(1, 20))
@@ -382,29 +563,22 @@ class ReportGenerator:
                     ])
                 
                 alert_table = Table(alert_data, colWidths=[1*inch, 1.5*inch, 1*inch, 1.5*inch, 1*inch])
-                alert_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#343a40')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 8),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.HexColor('#f8f9fa'), colors.white]),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ]))
+                alert_table.setStyle(_SENTIMENT_ALERT_TS)
                 
                 story.append(alert_table)
             
             # Build PDF
-            doc.build(story)
+            self._build_pdf(doc, story)
             return filepath
             
-        except Exception as e:
-            print(f"Error generating sentiment report: {e}")
+        except Exception:
+            logger.exception("Error generating sentiment report")
             return None
 
 
 if __name__ == "__main__":
     # Test report generation
+    logging.basicConfig(level=logging.INFO)
     generator = ReportGenerator()
     
     test_student = {
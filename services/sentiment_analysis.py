@@ -4,18 +4,90 @@ Analyzes emotional tone and detects distress signals
 """
 
 import re
-from textblob import TextBlob
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import time
 from datetime import datetime
+from functools import cached_property, lru_cache
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 from typing import Dict, List, Tuple, Optional
 
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; a combined regex is used instead
+    ahocorasick = None
+
+
+# Common abbreviations and slang, expanded in one pass during preprocessing
+_ABBREVIATIONS = {
+    'u': 'you',
+    'ur': 'your',
+    'cant': 'cannot',
+    'wont': 'will not',
+    'dont': 'do not',
+    'im': 'i am',
+    'ive': 'i have',
+    'thats': 'that is'
+}
+_ABBREVIATION_RE = re.compile(r'\b(' + '|'.join(map(re.escape, _ABBREVIATIONS)) + r')\b')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _expand_abbreviation(match) -> str:
+    """Replacement for a matched abbreviation"""
+    return _ABBREVIATIONS[match.group(1)]
+
+# VADER's scoring is quadratic in the number of words it finds in its lexicon,
+# and every emoji expands to a few of them ("face with tears of joy"), so an
+# emoji-spam message can pin a request thread for tens of seconds. Long runs of
+# symbols are cut to their first few and the text is capped before scoring.
+_MAX_VADER_LEN = 2000
+_SYMBOL_RUN_RE = re.compile(r'[^\x00-\x7f\w\s]{5,}')
+
+
+def _bound_vader_input(text: str) -> str:
+    """Text as passed to VADER, with its worst-case cost bounded"""
+    return _SYMBOL_RUN_RE.sub(lambda match: match.group(0)[:4], text)[:_MAX_VADER_LEN]
+
+
+def _is_word_char(char: str) -> bool:
+    """Whether a character counts as part of a word for regex \\b"""
+    return char.isalnum() or char == '_'
+
+
+def _keyword_matcher(keywords: List[str]):
+    """
+    Build a function returning the set of keywords that occur as whole words in
+    a text, scanning the text once whatever the number of keywords
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for keyword in keywords:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        
+        def find(text: str) -> set:
+            found = set()
+            last = len(text) - 1
+            for end, keyword in automaton.iter(text):
+                start = end - len(keyword) + 1
+                if ((start == 0 or not _is_word_char(text[start - 1])) and
+                        (end == last or not _is_word_char(text[end + 1]))):
+                    found.add(keyword)
+            return found
+        
+        return find
+    
+    # Zero-width lookahead so keyword matches may overlap, as with one search per keyword
+    alternation = '|'.join(map(re.escape, sorted(keywords, key=len, reverse=True)))
+    pattern = re.compile(r'\b(?=(' + alternation + r')\b)')
+    return lambda text: set(pattern.findall(text))
+
 
 class SentimentAnalyzer:
     """Advanced sentiment analysis with emotional distress detection"""
     
     def __init__(self):
-        self.vader_analyzer = SentimentIntensityAnalyzer()
+        self._timestamp_cache = (0, '')  # (second, ISO timestamp)
         
         # Keywords that indicate emotional distress
         self.distress_keywords = {
@@ -40,6 +112,29 @@ class SentimentAnalyzer:
             'exam', 'test', 'assignment', 'deadline', 'grade', 'fail',
             'behind', 'catch up', 'study', 'homework', 'project', 'presentation'
         ]
+        
+        # A single matcher over every keyword group; matches are reported in list order
+        groups = [
+            ('high_risk', self.distress_keywords['high_risk']),
+            ('medium_risk', self.distress_keywords['medium_risk']),
+            ('positive', self.distress_keywords['positive_indicators']),
+            ('academic', self.academic_stress_keywords)
+        ]
+        self._keyword_order = {}  # keyword -> (position, reported category)
+        for category, keywords in groups:
+            for keyword in keywords:
+                self._keyword_order[keyword] = (len(self._keyword_order), category)
+        self._find_keywords = _keyword_matcher(list(self._keyword_order))
+        
+        # Chat messages repeat a lot (greetings, thanks, canned prompts), so
+        # analyses are memoized on the preprocessed text
+        self._analyze_cached = lru_cache(maxsize=4096)(self._analyze_cleaned)
+    
+    @cached_property
+    def vader_analyzer(self):
+        """VADER analyzer, loaded on first use as its lexicon is a few MB resident"""
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        return SentimentIntensityAnalyzer()
     
     def analyze_sentiment(self, text: str) -> Dict:
         """
@@ -56,39 +151,53 @@ class SentimentAnalyzer:
         
         # Clean and preprocess text
         cleaned_text = self._preprocess_text(text)
+        return self._stamp_analysis(text, self._analyze_cached(cleaned_text))
+    
+    def _stamp_analysis(self, text: str, analysis: Dict) -> Dict:
+        """Full result for one text from its (possibly shared) cached analysis"""
+        emotion_analysis = analysis['emotion_analysis']
+        academic_stress = analysis['academic_stress']
         
-        # TextBlob analysis
-        blob = TextBlob(cleaned_text)
-        textblob_polarity = blob.sentiment.polarity
-        textblob_subjectivity = blob.sentiment.subjectivity
-        
+        # The cached result is shared, so hand out copies of its mutable parts
+        return {
+            'text': text,
+            'timestamp': self._now_iso(),
+            **analysis,
+            'sentiment_scores': dict(analysis['sentiment_scores']),
+            'emotion_analysis': {**emotion_analysis,
+                                 'detected_keywords': list(emotion_analysis['detected_keywords'])},
+            'academic_stress': {**academic_stress,
+                                'detected_terms': list(academic_stress['detected_terms'])}
+        }
+    
+    def _analyze_cleaned(self, cleaned_text: str) -> Dict:
+        """Analysis of preprocessed text, without the per-call text and timestamp"""
         # VADER analysis
-        vader_scores = self.vader_analyzer.polarity_scores(cleaned_text)
-        
-        # Keyword-based emotional analysis
-        emotion_analysis = self._analyze_emotional_keywords(cleaned_text)
+        vader_scores = self.vader_analyzer.polarity_scores(_bound_vader_input(cleaned_text))
+        vader_compound = vader_scores['compound']
         
-        # Academic stress detection
-        academic_stress = self._detect_academic_stress(cleaned_text)
+        # Keyword-based emotional analysis and academic stress detection,
+        # from one scan of the text
+        matches = self._scan_keywords(cleaned_text)
+        emotion_analysis = self._analyze_emotional_keywords(cleaned_text, matches)
+        academic_stress = self._detect_academic_stress(cleaned_text, matches)
         
         # Overall sentiment classification
-        overall_sentiment = self._classify_overall_sentiment(
-            textblob_polarity, vader_scores['compound'], emotion_analysis
-        )
+        overall_sentiment = self._classify_overall_sentiment(vader_compound, emotion_analysis)
         
         # Risk assessment
         risk_level = self._assess_risk_level(emotion_analysis, overall_sentiment, academic_stress)
         
         return {
-            'text': text,
-            'timestamp': datetime.now().isoformat(),
             'sentiment_scores': {
-                'textblob_polarity': round(textblob_polarity, 3),
-                'textblob_subjectivity': round(textblob_subjectivity, 3),
+                # Deprecated: TextBlob is no longer run; these mirror VADER's
+                # compound score and its share of non-neutral text
+                'textblob_polarity': round(vader_compound, 3),
+                'textblob_subjectivity': round(1 - vader_scores['neu'], 3),
                 'vader_positive': round(vader_scores['pos'], 3),
                 'vader_neutral': round(vader_scores['neu'], 3),
                 'vader_negative': round(vader_scores['neg'], 3),
-                'vader_compound': round(vader_scores['compound'], 3)
+                'vader_compound': round(vader_compound, 3)
             },
             'overall_sentiment': overall_sentiment,
             'emotion_analysis': emotion_analysis,
@@ -96,12 +205,37 @@ class SentimentAnalyzer:
             'risk_level': risk_level,
             'needs_attention': risk_level in ['high', 'medium'],
             'counselor_referral': risk_level == 'high',
-            'confidence_score': self._calculate_confidence(textblob_polarity, vader_scores['compound'])
+            'confidence_score': self._calculate_confidence(vader_compound)
         }
     
-    def analyze_batch(self, texts: List[str]) -> List[Dict]:
-        """Analyze multiple texts in batch"""
-        return [self.analyze_sentiment(text) for text in texts]
+    def analyze_batch(self, texts: List[str], workers: Optional[int] = None) -> List[Dict]:
+        """
+        Analyze multiple texts in batch, scoring each distinct text once
+        
+        Args:
+            texts: Input texts to analyze
+            workers: Number of processes to score the distinct texts in; large
+                corpora only, as each worker pays a process start-up
+            
+        Returns:
+            One analysis per input text, in order
+        """
+        cleaned = [self._preprocess_text(text) if text and text.strip() else None for text in texts]
+        unique = [cleaned_text for cleaned_text in dict.fromkeys(cleaned) if cleaned_text is not None]
+        
+        if workers and workers > 1 and len(unique) > 1:
+            chunksize = max(1, len(unique) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                analyses = dict(zip(unique, executor.map(_analyze_in_worker, unique, chunksize=chunksize)))
+        else:
+            # Kept per batch as well, as a large batch can evict its own repeats from the LRU
+            analyses = {cleaned_text: self._analyze_cached(cleaned_text) for cleaned_text in unique}
+        
+        return [
+            self._stamp_analysis(text, analyses[cleaned_text]) if cleaned_text is not None
+            else self._empty_analysis()
+            for text, cleaned_text in zip(texts, cleaned)
+        ]
     
     def get_sentiment_trends(self, analyses: List[Dict], days: int = 7) -> Dict:
         """
@@ -120,28 +254,23 @@ class SentimentAnalyzer:
         # Sort by timestamp
         sorted_analyses = sorted(analyses, key=lambda x: x['timestamp'])
         
+        # Collect scores and count risk levels in one pass
+        sentiment_scores = []
+        risk_counts = {'high': 0, 'medium': 0, 'low': 0}
+        for a in sorted_analyses:
+            sentiment_scores.append(a['sentiment_scores']['vader_compound'])
+            risk_level = a['risk_level']
+            if risk_level in risk_counts:
+                risk_counts[risk_level] += 1
+        
         # Calculate averages
-        sentiment_scores = [a['sentiment_scores']['vader_compound'] for a in sorted_analyses]
         avg_sentiment = sum(sentiment_scores) / len(sentiment_scores)
         
-        # Count risk levels
-        risk_counts = {
-            'high': sum(1 for a in sorted_analyses if a['risk_level'] == 'high'),
-            'medium': sum(1 for a in sorted_analyses if a['risk_level'] == 'medium'),
-            'low': sum(1 for a in sorted_analyses if a['risk_level'] == 'low')
-        }
-        
         # Determine trend
         if len(sentiment_scores) >= 2:
             recent_avg = sum(sentiment_scores[-3:]) / min(3, len(sentiment_scores))
             earlier_avg = sum(sentiment_scores[:-3]) / max(1, len(sentiment_scores) - 3)
-            
-            if recent_avg > earlier_avg + 0.1:
-                trend = 'improving'
-            elif recent_avg < earlier_avg - 0.1:
-                trend = 'declining'
-            else:
-                trend = 'stable'
+            trend = self._classify_trend(recent_avg, earlier_avg)
         else:
             trend = 'insufficient_data'
         
@@ -153,32 +282,79 @@ class SentimentAnalyzer:
             'needs_intervention': risk_counts['high'] > 0 or risk_counts['medium'] >= 3
         }
     
+    def get_sentiment_trends_df(self, df: pd.DataFrame) -> Dict:
+        """
+        Analyze sentiment trends from analyses already held in a DataFrame
+        
+        Args:
+            df: One row per analysis with 'vader_compound' and 'risk_level'
+                columns, and optionally 'timestamp'
+            
+        Returns:
+            Trend analysis summary, as from get_sentiment_trends
+        """
+        if df.empty:
+            return {'trend': 'no_data', 'average_sentiment': 0, 'risk_count': 0}
+        
+        if 'timestamp' in df.columns:
+            df = df.sort_values('timestamp', kind='stable')
+        
+        scores = df['vader_compound']
+        total = len(scores)
+        level_counts = df['risk_level'].value_counts()
+        risk_counts = {level: int(level_counts.get(level, 0)) for level in ('high', 'medium', 'low')}
+        
+        # Determine trend
+        if total >= 2:
+            recent_avg = scores.iloc[-3:].sum() / min(3, total)
+            earlier_avg = scores.iloc[:-3].sum() / max(1, total - 3)
+            trend = self._classify_trend(recent_avg, earlier_avg)
+        else:
+            trend = 'insufficient_data'
+        
+        return {
+            'trend': trend,
+            'average_sentiment': round(float(scores.mean()), 3),
+            'risk_counts': risk_counts,
+            'total_analyses': total,
+            'needs_intervention': risk_counts['high'] > 0 or risk_counts['medium'] >= 3
+        }
+    
+    def _classify_trend(self, recent_avg: float, earlier_avg: float) -> str:
+        """Compare the last three scores' average against the earlier ones"""
+        if recent_avg > earlier_avg + 0.1:
+            return 'improving'
+        elif recent_avg < earlier_avg - 0.1:
+            return 'declining'
+        return 'stable'
+    
+    def _now_iso(self) -> str:
+        """Timestamp for an analysis, formatted at most once per second"""
+        second = int(time.time())
+        cached_second, formatted = self._timestamp_cache
+        if second != cached_second:
+            formatted = datetime.fromtimestamp(second).isoformat()
+            self._timestamp_cache = (second, formatted)
+        return formatted
+    
     def _preprocess_text(self, text: str) -> str:
         """Clean and preprocess text for analysis"""
         # Convert to lowercase
         text = text.lower()
         
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = _WHITESPACE_RE.sub(' ', text).strip()
         
         # Handle common abbreviations and slang
-        replacements = {
-            'u': 'you',
-            'ur': 'your',
-            'cant': 'cannot',
-            'wont': 'will not',
-            'dont': 'do not',
-            'im': 'i am',
-            'ive': 'i have',
-            'thats': 'that is'
-        }
-        
-        for old, new in replacements.items():
-            text = re.sub(r'\b' + old + r'\b', new, text)
-        
-        return text
+        return _ABBREVIATION_RE.sub(_expand_abbreviation, text)
+    
+    def _scan_keywords(self, text: str) -> List[Tuple[str, str]]:
+        """(category, keyword) for every keyword in the text, in list order"""
+        order = self._keyword_order
+        return [(order[keyword][1], keyword)
+                for keyword in sorted(self._find_keywords(text), key=order.__getitem__)]
     
-    def _analyze_emotional_keywords(self, text: str) -> Dict:
+    def _analyze_emotional_keywords(self, text: str, matches: Optional[List[Tuple[str, str]]] = None) -> Dict:
         """Analyze text for emotional keywords"""
         analysis = {
             'high_risk_count': 0,
@@ -187,32 +363,21 @@ class SentimentAnalyzer:
             'detected_keywords': []
         }
         
-        for keyword in self.distress_keywords['high_risk']:
-            if re.search(r'\b' + re.escape(keyword) + r'\b', text):
-                analysis['high_risk_count'] += 1
-                analysis['detected_keywords'].append(('high_risk', keyword))
-        
-        for keyword in self.distress_keywords['medium_risk']:
-            if re.search(r'\b' + re.escape(keyword) + r'\b', text):
-                analysis['medium_risk_count'] += 1
-                analysis['detected_keywords'].append(('medium_risk', keyword))
-        
-        for keyword in self.distress_keywords['positive_indicators']:
-            if re.search(r'\b' + re.escape(keyword) + r'\b', text):
-                analysis['positive_count'] += 1
-                analysis['detected_keywords'].append(('positive', keyword))
+        if matches is None:
+            matches = self._scan_keywords(text)
+        for category, keyword in matches:
+            if category != 'academic':
+                analysis[category + '_count'] += 1
+                analysis['detected_keywords'].append((category, keyword))
         
         return analysis
     
-    def _detect_academic_stress(self, text: str) -> Dict:
+    def _detect_academic_stress(self, text: str, matches: Optional[List[Tuple[str, str]]] = None) -> Dict:
         """Detect academic-related stress indicators"""
-        stress_count = 0
-        detected_terms = []
-        
-        for keyword in self.academic_stress_keywords:
-            if re.search(r'\b' + re.escape(keyword) + r'\b', text):
-                stress_count += 1
-                detected_terms.append(keyword)
+        if matches is None:
+            matches = self._scan_keywords(text)
+        detected_terms = [keyword for category, keyword in matches if category == 'academic']
+        stress_count = len(detected_terms)
         
         return {
             'stress_indicators': stress_count,
@@ -220,19 +385,16 @@ class SentimentAnalyzer:
             'has_academic_stress': stress_count >= 2
         }
     
-    def _classify_overall_sentiment(self, textblob_polarity: float, vader_compound: float, emotion_analysis: Dict) -> str:
+    def _classify_overall_sentiment(self, vader_compound: float, emotion_analysis: Dict) -> str:
         """Classify overall sentiment based on multiple indicators"""
-        # Weight the scores
-        avg_score = (textblob_polarity + vader_compound) / 2
-        
         # Adjust based on emotional keywords
         if emotion_analysis['high_risk_count'] > 0:
             return 'very_negative'
         elif emotion_analysis['medium_risk_count'] > emotion_analysis['positive_count']:
             return 'negative'
-        elif avg_score >= 0.1:
+        elif vader_compound >= 0.1:
             return 'positive'
-        elif avg_score <= -0.1:
+        elif vader_compound <= -0.1:
             return 'negative'
         else:
             return 'neutral'
@@ -248,17 +410,16 @@ class SentimentAnalyzer:
         else:
             return 'low'
     
-    def _calculate_confidence(self, textblob_polarity: float, vader_compound: float) -> float:
+    def _calculate_confidence(self, vader_compound: float) -> float:
         """Calculate confidence score for the analysis"""
-        # Higher confidence when both methods agree
-        agreement = 1 - abs(textblob_polarity - vader_compound) / 2
-        return round(agreement, 3)
+        # Higher confidence the further VADER's score is from neutral
+        return round(abs(vader_compound), 3)
     
     def _empty_analysis(self) -> Dict:
         """Return empty analysis for invalid input"""
         return {
             'text': '',
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': self._now_iso(),
             'sentiment_scores': {
                 'textblob_polarity': 0,
                 'textblob_subjectivity': 0,
@@ -290,6 +451,11 @@ class SentimentAnalyzer:
 sentiment_analyzer = SentimentAnalyzer()
 
 
+def _analyze_in_worker(cleaned_text: str) -> Dict:
+    """Score one preprocessed text in a batch worker process"""
+    return sentiment_analyzer._analyze_cleaned(cleaned_text)
+
+
 def analyze_text_sentiment(text: str) -> Dict:
     """Convenience function for sentiment analysis"""
     return sentiment_analyzer.analyze_sentiment(text)
@@ -5,13 +5,19 @@ Simple test to verify the chat endpoint is working correctly.
 
 import requests
 import json
+from requests.adapters import HTTPAdapter
+
+# One pooled keep-alive connection shared by every request in this script
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+TIMEOUT = (3, 60)  # (connect, read) seconds, so a hung server fails the run instead of blocking it
 
 def test_chat_functionality():
     """Test basic chat functionality"""
     base_url = "http://localhost:5000"
     
-    # Create session
-    session = requests.Session()
+    # Shared session
+    session = SESSION
     
     print("=== Testing Chat Functionality ===")
     
@@ -23,7 +29,7 @@ def test_chat_functionality():
         'role': 'student'
     }
     
-    login_response = session.post(f"{base_url}/login", data=login_data)
+    login_response = session.post(f"{base_url}/login", data=login_data, timeout=TIMEOUT)
     print(f"   Login status: {login_response.status_code}")
     
     if login_response.status_code != 200:
@@ -40,7 +46,7 @@ def test_chat_functionality():
         'session_id': 'test_session_001'
     }
     
-    chat_response = session.post(f"{base_url}/chat", json=chat_data)
+    chat_response = session.post(f"{base_url}/chat", json=chat_data, timeout=TIMEOUT)
     print(f"   Chat status: {chat_response.status_code}")
     
     if chat_response.status_code != 200:
@@ -63,8 +69,8 @@ def test_stress_detection():
     """Test stress detection functionality"""
     base_url = "http://localhost:5000"
     
-    # Create session
-    session = requests.Session()
+    # Shared session
+    session = SESSION
     
     print("\n=== Testing Stress Detection ===")
     
@@ -75,7 +81,7 @@ def test_stress_detection():
         'role': 'student'
     }
     
-    session.post(f"{base_url}/login", data=login_data)
+    session.post(f"{base_url}/login", data=login_data, timeout=TIMEOUT)
     
     # Test with stress message
     print("\n3. Testing stress detection...")
@@ -85,7 +91,7 @@ def test_stress_detection():
         'session_id': 'test_session_002'
     }
     
-    chat_response = session.post(f"{base_url}/chat", json=chat_data)
+    chat_response = session.post(f"{base_url}/chat", json=chat_data, timeout=TIMEOUT)
     
     if chat_response.status_code == 200:
         try:
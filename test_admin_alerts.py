@@ -6,18 +6,24 @@ Test script to debug admin alert functionality issues
 import requests
 import json
 import sys
+from requests.adapters import HTTPAdapter
+
+# One pooled keep-alive connection shared by every request in this script
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+TIMEOUT = (3, 60)  # (connect, read) seconds, so a hung server fails the run instead of blocking it
 
 def test_admin_alerts():
     """Test admin alert functionality"""
     print("=== Testing Admin Alert Functionality ===")
     
-    # Create session
-    session = requests.Session()
+    # Shared session
+    session = SESSION
     
     # Test admin login
     print("\n1. Testing Admin Login...")
     login_data = {'username': 'admin', 'password': 'admin@123', 'role': 'administrator'}
-    login_response = session.post('http://localhost:5000/login', data=login_data)
+    login_response = session.post('http://localhost:5000/login', data=login_data, timeout=TIMEOUT)
     
     if login_response.status_code == 200:
         print("✓ Admin login successful")
@@ -29,7 +35,7 @@ def test_admin_alerts():
     print("\n2. Testing Individual Student Alert...")
     try:
         # First get some students from the admin dashboard
-        admin_response = session.get('http://localhost:5000/admin/dashboard')
+        admin_response = session.get('http://localhost:5000/admin/dashboard', timeout=TIMEOUT)
         if admin_response.status_code == 200:
             print("✓ Admin dashboard accessible")
         else:
@@ -45,7 +51,7 @@ def test_admin_alerts():
         
         alert_response = session.post('http://localhost:5000/admin/send_alert/3', 
                                     json=alert_data,
-                                    headers={'Content-Type': 'application/json'})
+                                    headers={'Content-Type': 'application/json'}, timeout=TIMEOUT)
         
         print(f"Alert response status: {alert_response.status_code}")
         print(f"Alert response headers: {dict(alert_response.headers)}")
@@ -66,7 +72,7 @@ def test_admin_alerts():
     # Test bulk alerts
     print("\n3. Testing Bulk Alerts...")
     try:
-        bulk_response = session.get('http://localhost:5000/send_bulk_alerts')
+        bulk_response = session.get('http://localhost:5000/send_bulk_alerts', timeout=TIMEOUT)
         print(f"Bulk alert response status: {bulk_response.status_code}")
         print(f"Bulk alert response headers: {dict(bulk_response.headers)}")
         
@@ -3,14 +3,31 @@
 Comprehensive test script for admin alert functionality
 """
 
+import re
 import requests
 import sys
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+
+# One pooled keep-alive connection shared by every request in this script
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+TIMEOUT = (3, 60)  # (connect, read) seconds, so a hung server fails the run instead of blocking it
+
+# One entry of the /debug_users page: user ID, username, role and student ID
+_USER_RE = re.compile(
+    r'User ID:(?:</strong>)?\s*(\d+)<br>.*?'
+    r'Username:(?:</strong>)?\s*([^<]*?)\s*<br>.*?'
+    r'Role:(?:</strong>)?\s*([^<]*?)\s*<br>.*?'
+    r'Student ID:(?:</strong>)?\s*([^<]*?)\s*<br>',
+    re.S
+)
+_USER_FIELDS = ('user_id', 'username', 'role', 'student_id')
 
 def test_admin_alerts():
     """Test admin alert functionality comprehensively"""
     base_url = "http://localhost:5000"
-    session = requests.Session()
+    session = SESSION
     
     print("=== ADMIN ALERT TESTING ===")
     print(f"Testing at: {datetime.now()}")
@@ -24,7 +41,7 @@ def test_admin_alerts():
     }
     
     try:
-        login_response = session.post(f"{base_url}/login", data=login_data)
+        login_response = session.post(f"{base_url}/login", data=login_data, timeout=TIMEOUT)
         print(f"   Login Status: {login_response.status_code}")
         if login_response.status_code == 200:
             print("   ✓ Admin login successful")
@@ -38,24 +55,12 @@ def test_admin_alerts():
     # Test 2: Check what users exist
     print("\n2. Checking available users...")
     try:
-        users_response = session.get(f"{base_url}/debug_users")
+        users_response = session.get(f"{base_url}/debug_users", timeout=TIMEOUT)
         if users_response.status_code == 200:
             print("   ✓ Retrieved user list")
             # Parse the HTML to find student users
-            html_content = users_response.text
-            students = []
-            lines = html_content.split('\n')
-            current_user = {}
-            for line in lines:
-                if 'Username:' in line:
-                    current_user['username'] = line.split('Username:')[1].split('<')[0].strip()
-                elif 'Role:' in line:
-                    current_user['role'] = line.split('Role:')[1].split('<')[0].strip()
-                elif 'Student ID:' in line:
-                    current_user['student_id'] = line.split('Student ID:')[1].split('<')[0].strip()
-                    if current_user.get('role') == 'student':
-                        students.append(current_user.copy())
-                    current_user = {}
+            users = [dict(zip(_USER_FIELDS, match)) for match in _USER_RE.findall(users_response.text)]
+            students = [user for user in users if user['role'] == 'student']
             
             print(f"   Found {len(students)} students:")
             for student in students[:5]:  # Show first 5
@@ -80,7 +85,7 @@ def test_admin_alerts():
     print("\n3. Testing Individual Student Alert...")
     try:
         # Find a student user ID from the admin dashboard
-        admin_response = session.get(f"{base_url}/admin/dashboard")
+        admin_response = session.get(f"{base_url}/admin/dashboard", timeout=TIMEOUT)
         if admin_response.status_code == 200:
             print("   ✓ Accessed admin dashboard")
             
@@ -95,7 +100,8 @@ def test_admin_alerts():
             alert_response = session.post(
                 f"{base_url}/admin/send_alert/5",  # User ID 5 is S001 based on our earlier check
                 json=alert_data,
-                headers={'Content-Type': 'application/json'}
+                headers={'Content-Type': 'application/json'},
+                timeout=TIMEOUT
             )
             
             print(f"   Alert Response Status: {alert_response.status_code}")
@@ -120,7 +126,7 @@ def test_admin_alerts():
     # Test 4: Test bulk alerts
     print("\n4. Testing Bulk Alerts...")
     try:
-        bulk_response = session.get(f"{base_url}/send_bulk_alerts")
+        bulk_response = session.get(f"{base_url}/send_bulk_alerts", timeout=TIMEOUT)
         print(f"   Bulk Alert Status: {bulk_response.status_code}")
         if bulk_response.status_code == 200:
             print("   ✓ Bulk alerts triggered successfully")
@@ -3,12 +3,29 @@
 Test script to debug alert functionality with specific students
 """
 
+import re
 import requests
 import json
+from requests.adapters import HTTPAdapter
+
+# One pooled keep-alive connection shared by every request in this script
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+TIMEOUT = (3, 60)  # (connect, read) seconds, so a hung server fails the run instead of blocking it
+
+# One entry of the /debug_users page: user ID, username, role and student ID
+_USER_RE = re.compile(
+    r'User ID:(?:</strong>)?\s*(\d+)<br>.*?'
+    r'Username:(?:</strong>)?\s*([^<]*?)\s*<br>.*?'
+    r'Role:(?:</strong>)?\s*([^<]*?)\s*<br>.*?'
+    r'Student ID:(?:</strong>)?\s*([^<]*?)\s*<br>',
+    re.S
+)
+_USER_FIELDS = ('user_id', 'username', 'role', 'student_id')
 
 def test_alert_with_student():
     base_url = "http://localhost:5000"
-    session = requests.Session()
+    session = SESSION
     
     # Login as admin
     login_data = {
@@ -17,7 +34,7 @@ def test_alert_with_student():
         'role': 'administrator'
     }
     
-    login_response = session.post(f"{base_url}/login", data=login_data)
+    login_response = session.post(f"{base_url}/login", data=login_data, timeout=TIMEOUT)
     if login_response.status_code != 200:
         print("Failed to login")
         return False
@@ -28,19 +45,11 @@ def test_alert_with_student():
     print("\n=== Testing Individual Alert to S001 ===")
     
     # First, let's check what user ID corresponds to S001
-    debug_response = session.get(f"{base_url}/debug_users")
+    debug_response = session.get(f"{base_url}/debug_users", timeout=TIMEOUT)
     if debug_response.status_code == 200:
         # Find the user ID for S001
-        lines = debug_response.text.split('\n')
-        s001_user_id = None
-        for i, line in enumerate(lines):
-            if 'S001' in line and 'Username:' in line:
-                # Look backwards for the user ID
-                for j in range(max(0, i-20), i):
-                    if 'User ID:' in lines[j]:
-                        s001_user_id = lines[j].split('User ID:')[1].split('<')[0].strip()
-                        break
-                break
+        users = [dict(zip(_USER_FIELDS, match)) for match in _USER_RE.findall(debug_response.text)]
+        s001_user_id = next((user['user_id'] for user in users if 'S001' in (user['username'], user['student_id'])), None)
         
         if s001_user_id:
             print(f"✓ Found S001 user ID: {s001_user_id}")
@@ -55,7 +64,8 @@ def test_alert_with_student():
             alert_response = session.post(
                 f"{base_url}/admin/send_alert/{s001_user_id}",
                 json=alert_data,
-                headers={'Content-Type': 'application/json'}
+                headers={'Content-Type': 'application/json'},
+                timeout=TIMEOUT
             )
             
             print(f"Alert response status: {alert_response.status_code}")
@@ -69,7 +79,7 @@ def test_alert_with_student():
     
     # Test bulk alerts
     print("\n=== Testing Bulk Alerts ===")
-    bulk_response = session.get(f"{base_url}/send_bulk_alerts")
+    bulk_response = session.get(f"{base_url}/send_bulk_alerts", timeout=TIMEOUT)
     print(f"Bulk alerts status: {bulk_response.status_code}")
     if bulk_response.status_code in [200, 302]:  # 302 is redirect
         print("✓ Bulk alerts triggered")
@@ -79,8 +89,8 @@ def test_alert_with_student():
     # Check notification log
     print("\n=== Checking Notification Log ===")
     try:
-        with open('data/notification_log.json', 'r') as f:
-            log_data = json.load(f)
+        with open('data/notification_log.jsonl', 'r') as f:
+            log_data = [json.loads(line) for line in f if line.strip()]
             print(f"Found {len(log_data)} notifications in log")
             for notification in log_data[-5:]:  # Show last 5
                 print(f"  - {notification.get('timestamp', 'N/A')}: {notification.get('type', 'N/A')} to {notification.get('recipient', 'N/A')}")
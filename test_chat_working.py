@@ -6,42 +6,32 @@ This tests basic chat functionality without debugging output.
 
 import requests
 import json
+import pathlib
 
-def test_chat_endpoint():
+from http_client import login
+
+# Chat messages shared with the other test scripts
+MESSAGES = json.loads((pathlib.Path(__file__).parent / 'tests' / 'fixtures' / 'messages.json')
+                      .read_text(encoding='utf-8'))
+
+def test_chat_endpoint(student_session):
     """Test the chat endpoint with different types of messages"""
     
     # Base URL
     base_url = "http://localhost:5000"
     
-    # Test login
-    login_data = {
-        'username': 'S001',
-        'password': 'S001'
-    }
-    
-    session = requests.Session()
-    
-    print("Testing login...")
-    login_response = session.post(f"{base_url}/login", data=login_data)
-    
-    if login_response.status_code != 200:
-        print(f"Login failed: {login_response.status_code}")
-        return False
-    
-    print("Login successful!")
-    
     # Test messages
     test_messages = [
         {
-            'message': 'Hello, I need help with my studies.',
+            'message': MESSAGES['help_request'],
             'expected_risk': 'low'
         },
         {
-            'message': 'I am feeling really stressed about my exams and I can\'t cope with the pressure.',
+            'message': MESSAGES['exam_stress'],
             'expected_risk': 'high'
         },
         {
-            'message': 'I am feeling great today! My studies are going well and I am excited about my future.',
+            'message': MESSAGES['positive_day'],
             'expected_risk': 'low'
         }
     ]
@@ -57,7 +47,7 @@ def test_chat_endpoint():
             'session_id': f'test_session_{i+1}'
         }
         
-        response = session.post(f"{base_url}/chat", json=chat_data)
+        response = student_session.post(f"{base_url}/chat", json=chat_data)
         
         if response.status_code != 200:
             print(f"  FAIL: HTTP {response.status_code}")
@@ -94,7 +84,7 @@ def test_chat_endpoint():
     else:
         print("❌ Some tests failed.")
     
-    return all_passed
+    assert all_passed, "Some chat messages failed; see the output above"
 
 if __name__ == "__main__":
-    test_chat_endpoint()
\ No newline at end of file
+    test_chat_endpoint(login('S001', 'S001', 'student'))
\ No newline at end of file
@@ -4,172 +4,119 @@ Test script to verify dashboard functionality
 Tests faculty predict risk and student dashboard features
 """
 
-import requests
 import json
 import sys
 
-def test_login():
+from http_client import make_session
+
+def test_login(http):
     """Test login functionality"""
-    session = requests.Session()
-    
     # Test faculty login
     print("=== Testing Faculty Login ===")
-    try:
-        login_data = {
-            'username': 'F001',
-            'password': 'F001',
-            'role': 'faculty'
-        }
-        response = session.post('http://localhost:5000/login', data=login_data)
-        print(f"Faculty login status: {response.status_code}")
-        
-        if response.status_code == 200:
-            print("✓ Faculty login successful")
-            return session, 'faculty'
-        else:
-            print("✗ Faculty login failed")
-            return None, None
-    except Exception as e:
-        print(f"✗ Faculty login error: {e}")
-        return None, None
+    login_data = {
+        'username': 'F001',
+        'password': 'F001',
+        'role': 'faculty'
+    }
+    response = http.post('http://localhost:5000/login', data=login_data)
+    print(f"Faculty login status: {response.status_code}")
+    # A rejected login re-renders the form instead of redirecting to a dashboard
+    assert response.status_code == 200 and not response.url.endswith('/login'), "Faculty login failed"
+    print("✓ Faculty login successful")
 
-def test_student_login():
+def test_student_login(http):
     """Test student login"""
-    session = requests.Session()
-    
     print("\n=== Testing Student Login ===")
-    try:
-        login_data = {
-            'username': 'S001',
-            'password': 'S001',
-            'role': 'student'
-        }
-        response = session.post('http://localhost:5000/login', data=login_data)
-        print(f"Student login status: {response.status_code}")
-        
-        if response.status_code == 200:
-            print("✓ Student login successful")
-            return session, 'student'
-        else:
-            print("✗ Student login failed")
-            return None, None
-    except Exception as e:
-        print(f"✗ Student login error: {e}")
-        return None, None
+    login_data = {
+        'username': 'S001',
+        'password': 'S001',
+        'role': 'student'
+    }
+    response = http.post('http://localhost:5000/login', data=login_data)
+    print(f"Student login status: {response.status_code}")
+    assert response.status_code == 200 and not response.url.endswith('/login'), "Student login failed"
+    print("✓ Student login successful")
 
-def test_faculty_predict_risk(session):
+def test_faculty_predict_risk(faculty_session):
     """Test faculty predict risk functionality"""
     print("\n=== Testing Faculty Predict Risk ===")
     
-    try:
-        # Test predict risk API
-        predict_data = {
-            'student_id': 'S001'
-        }
-        response = session.post('http://localhost:5000/api/predict_risk', 
-                              json=predict_data,
-                              headers={'Content-Type': 'application/json'})
-        
-        print(f"Predict risk status: {response.status_code}")
-        
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✓ Predict risk successful: {result}")
-            return True
-        else:
-            print(f"✗ Predict risk failed: {response.text}")
-            return False
-            
-    except Exception as e:
-        print(f"✗ Predict risk error: {e}")
-        return False
+    # Test predict risk API
+    predict_data = {
+        'student_id': 'S001'
+    }
+    response = faculty_session.post('http://localhost:5000/api/predict_risk', 
+                                  json=predict_data,
+                                  headers={'Content-Type': 'application/json'})
+    
+    print(f"Predict risk status: {response.status_code}")
+    assert response.status_code == 200, f"Predict risk failed: {response.text}"
+    
+    result = response.json()
+    assert result.get('success'), f"Predict risk failed: {result}"
+    print(f"✓ Predict risk successful: {result}")
 
-def test_student_ai_suggestions(session):
+def test_student_ai_suggestions(student_session):
     """Test student AI suggestions"""
     print("\n=== Testing Student AI Suggestions ===")
     
-    try:
-        response = session.get('http://localhost:5000/api/ai_suggestions/S001')
-        print(f"AI suggestions status: {response.status_code}")
-        
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✓ AI suggestions successful: {result}")
-            return True
-        else:
-            print(f"✗ AI suggestions failed: {response.text}")
-            return False
-            
-    except Exception as e:
-        print(f"✗ AI suggestions error: {e}")
-        return False
+    response = student_session.get('http://localhost:5000/api/ai_suggestions/S001')
+    print(f"AI suggestions status: {response.status_code}")
+    assert response.status_code == 200, f"AI suggestions failed: {response.text}"
+    
+    result = response.json()
+    print(f"✓ AI suggestions successful: {result}")
 
-def test_student_chat(session):
+def test_student_chat(student_session):
     """Test student chat functionality"""
     print("\n=== Testing Student Chat ===")
     
-    try:
-        chat_data = {
-            'student_id': 'S001',
-            'message': 'I need help with my studies'
-        }
-        response = session.post('http://localhost:5000/chat', 
-                              json=chat_data,
-                              headers={'Content-Type': 'application/json'})
-        
-        print(f"Chat status: {response.status_code}")
-        
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✓ Chat successful: {result}")
-            return True
-        else:
-            print(f"✗ Chat failed: {response.text}")
-            return False
-            
-    except Exception as e:
-        print(f"✗ Chat error: {e}")
-        return False
+    chat_data = {
+        'student_id': 'S001',
+        'message': 'I need help with my studies'
+    }
+    response = student_session.post('http://localhost:5000/chat', 
+                                  json=chat_data,
+                                  headers={'Content-Type': 'application/json'})
+    
+    print(f"Chat status: {response.status_code}")
+    assert response.status_code == 200, f"Chat failed: {response.text}"
+    
+    result = response.json()
+    assert result.get('success'), f"Chat failed: {result}"
+    print(f"✓ Chat successful: {result}")
 
-def test_student_support_page(session):
+def test_student_support_page(student_session):
     """Test student support page access"""
     print("\n=== Testing Student Support Page ===")
     
-    try:
-        response = session.get('http://localhost:5000/student_support')
-        print(f"Support page status: {response.status_code}")
-        
-        if response.status_code == 200:
-            print("✓ Support page accessible")
-            return True
-        else:
-            print(f"✗ Support page failed: {response.text}")
-            return False
-            
-    except Exception as e:
-        print(f"✗ Support page error: {e}")
-        return False
+    response = student_session.get('http://localhost:5000/student_support')
+    print(f"Support page status: {response.status_code}")
+    assert response.status_code == 200, f"Support page failed: {response.text}"
+    print("✓ Support page accessible")
 
 def main():
     """Main test function"""
     print("Testing Dashboard Features")
     print("=" * 50)
     
+    # One pooled connection serves both roles
+    http = make_session()
+    
     # Test faculty features
-    faculty_session, role = test_login()
-    if faculty_session:
-        test_faculty_predict_risk(faculty_session)
+    test_login(http)
+    test_faculty_predict_risk(http)
     
-    # Test student features
-    student_session, role = test_student_login()
-    if student_session:
-        test_student_ai_suggestions(student_session)
-        test_student_chat(student_session)
-        test_student_support_page(student_session)
+    # Test student features (drop the faculty cookie first: /login
+    # redirects users who are already signed in)
+    http.cookies.clear()
+    test_student_login(http)
+    test_student_ai_suggestions(http)
+    test_student_chat(http)
+    test_student_support_page(http)
     
     print("\n" + "=" * 50)
-    print("Test Summary:")
-    print("Check the output above to see which features are working correctly.")
+    print("✓ All dashboard features are working")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,32 +3,30 @@
 Test individual alert with correct user ID
 """
 
-import requests
+import contextlib
+import io
 import json
-import time
+import pathlib
 
-def test_individual_alert():
-    # Add a delay to allow the server to start
-    time.sleep(5)
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib json module is used otherwise
+    orjson = None
 
-    base_url = "http://localhost:5000"
-    session = requests.Session()
-    
-    # Login as admin
-    login_data = {
-        'username': 'admin',
-        'password': 'admin@123',
-        'role': 'administrator'
-    }
-    
-    login_response = session.post(f"{base_url}/login", data=login_data)
-    if login_response.status_code != 200:
-        print("Failed to login")
-        print(f"Response status: {login_response.status_code}")
-        print(f"Response text: {login_response.text}")
-        return False
+from http_client import login, wait_for_server
+
+def read_notification_tail(path='data/notification_log.jsonl', count=3):
+    """Return (number of entries, last `count` entries) of the JSON Lines log
     
-    print("✓ Admin logged in successfully")
+    Lines are counted on the raw bytes and only the tail is decoded, so a
+    large log is never parsed in full.
+    """
+    lines = [line for line in pathlib.Path(path).read_bytes().splitlines() if line.strip()]
+    loads = orjson.loads if orjson is not None else json.loads
+    return len(lines), [loads(line) for line in lines[-count:]]
+
+def test_individual_alert(admin_session):
+    base_url = "http://localhost:5000"
     
     # Test individual alert to student S001 (user ID 5)
     print("\n=== Testing Individual Alert to S001 (User ID 5) ===")
@@ -39,38 +37,37 @@ def test_individual_alert():
         'student_name': 'Alice Johnson'
     }
     
-    alert_response = session.post(
+    alert_response = admin_session.post(
         f"{base_url}/admin/send_alert/5",  # User ID 5 is S001
         json=alert_data,
         headers={'Content-Type': 'application/json'}
     )
     
     print(f"Alert response status: {alert_response.status_code}")
-    if alert_response.status_code == 200:
-        result = alert_response.json()
-        print(f"Alert result: {result}")
-        if result.get('success'):
-            print("✓ Individual alert sent successfully!")
-        else:
-            print(f"✗ Alert failed: {result.get('message')}")
-    else:
-        print(f"✗ Alert request failed: {alert_response.text}")
+    assert alert_response.status_code == 200, f"Alert request failed: {alert_response.text}"
+    result = alert_response.json()
+    print(f"Alert result: {result}")
+    assert result.get('success'), f"Alert failed: {result.get('message')}"
+    print("✓ Individual alert sent successfully!")
     
     # Check notification log after individual alert
     print("\n=== Checking Notification Log After Individual Alert ===")
-    try:
-        with open('data/notification_log.json', 'r') as f:
-            log_data = json.load(f)
-            print(f"Found {len(log_data)} notifications in log")
-            # Show the most recent notifications
-            recent_notifications = log_data[-3:] if len(log_data) >= 3 else log_data
-            for notification in recent_notifications:
-                print(f"  - {notification.get('timestamp', 'N/A')}: {notification.get('alert_type', 'N/A')} alert to {notification.get('student_name', 'N/A')} ({notification.get('student_id', 'N/A')})")
-    except Exception as e:
-        print(f"Could not read notification log: {e}")
+    # The faculty scripts may log their own alerts meanwhile, so search a longer tail
+    total, recent_notifications = read_notification_tail(count=10)
+    print(f"Found {total} notifications in log")
+    # Show the most recent notifications
+    for notification in recent_notifications[-3:]:
+        print(f"  - {notification.get('timestamp', 'N/A')}: {notification.get('alert_type', 'N/A')} alert to {notification.get('student_name', 'N/A')} ({notification.get('student_id', 'N/A')})")
+    assert any(n.get('student_id') == 'S001' for n in recent_notifications), \
+        "The alert to S001 is not in the notification log"
 
 if __name__ == "__main__":
-    with open("test_output.txt", "w", encoding="utf-8") as f:
-        import sys
-        sys.stdout = f
-        test_individual_alert()
\ No newline at end of file
+    # Give a server that is still starting up a few seconds to come up
+    wait_for_server(timeout=5)
+    # Collect the output in memory and write the file once at the end
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            test_individual_alert(login('admin', 'admin@123', 'administrator'))
+    finally:
+        pathlib.Path("test_output.txt").write_text(output.getvalue(), encoding="utf-8")
\ No newline at end of file
@@ -1,4 +1,4 @@
-import requests
+from http_client import make_session
 
 # Test administrator login
 login_data = {
@@ -7,14 +7,17 @@ login_data = {
     'role': 'administrator'
 }
 
-try:
-    response = requests.post('http://localhost:5000/login', data=login_data, allow_redirects=False)
+def test_login(http):
+    response = http.post('http://localhost:5000/login', data=login_data, allow_redirects=False)
     print(f'Login Response Status: {response.status_code}')
-    if 'Location' in response.headers:
-        location = response.headers['Location']
-        print(f'Redirected to: {location}')
-    else:
+    if 'Location' not in response.headers:
         print('No redirect, showing response preview:')
         print(response.text[:300])
-except Exception as e:
-    print(f'Error testing login: {e}')
\ No newline at end of file
+    # A successful login redirects to the dashboard; a rejected one re-renders the form
+    assert 'Location' in response.headers, f"Login was not redirected (HTTP {response.status_code})"
+    location = response.headers['Location']
+    print(f'Redirected to: {location}')
+    assert not location.endswith('/login'), f"Login redirected back to {location}"
+
+if __name__ == "__main__":
+    test_login(make_session())
\ No newline at end of file
@@ -3,52 +3,49 @@
 Test script to verify the Send Alert functionality in faculty dashboard
 """
 
-import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 
-def test_send_alert_functionality():
+from http_client import login
+
+def test_send_alert_functionality(faculty_session):
     """Test the complete send alert functionality"""
     print("=== Testing Send Alert Functionality ===")
     
-    # Create session
-    session = requests.Session()
-    
-    # Test faculty login
-    print("\n1. Testing Faculty Login...")
-    login_data = {'username': 'F001', 'password': 'F001', 'role': 'faculty'}
-    login_response = session.post('http://localhost:5000/login', data=login_data)
-    
-    if login_response.status_code == 200:
-        print("✓ Faculty login successful")
-    else:
-        print(f"✗ Faculty login failed: {login_response.status_code}")
-        return False
-    
     # Test send alert for multiple students
     test_students = ['S001', 'S002', 'S003']
     
-    for student_id in test_students:
-        print(f"\n2. Testing Send Alert for student {student_id}...")
+    # The alerts are independent, so send them concurrently over the pooled session
+    with ThreadPoolExecutor(max_workers=len(test_students)) as executor:
+        futures = [executor.submit(faculty_session.post, f'http://localhost:5000/api/send_alert/{student_id}')
+                   for student_id in test_students]
+    
+    failed = []
+    for student_id, future in zip(test_students, futures):
+        print(f"\nTesting Send Alert for student {student_id}...")
         
         try:
-            alert_response = session.post(f'http://localhost:5000/api/send_alert/{student_id}')
-            
-            if alert_response.status_code == 200:
-                result = alert_response.json()
-                if result.get('success'):
-                    print(f"✓ Alert sent successfully for student {student_id}")
-                    print(f"  Message: {result.get('message')}")
-                else:
-                    print(f"✗ Alert failed for student {student_id}: {result.get('message')}")
-            else:
-                print(f"✗ Alert request failed for student {student_id}: {alert_response.status_code}")
-                print(f"  Response: {alert_response.text}")
-                
+            alert_response = future.result()
         except Exception as e:
             print(f"✗ Exception occurred for student {student_id}: {str(e)}")
+            failed.append(student_id)
+            continue
+        
+        if alert_response.status_code == 200:
+            result = alert_response.json()
+            if result.get('success'):
+                print(f"✓ Alert sent successfully for student {student_id}")
+                print(f"  Message: {result.get('message')}")
+            else:
+                print(f"✗ Alert failed for student {student_id}: {result.get('message')}")
+                failed.append(student_id)
+        else:
+            print(f"✗ Alert request failed for student {student_id}: {alert_response.status_code}")
+            print(f"  Response: {alert_response.text}")
+            failed.append(student_id)
     
     print("\n=== Send Alert Test Complete ===")
-    return True
+    assert not failed, f"Alerts failed for {', '.join(failed)}"
 
 if __name__ == "__main__":
-    test_send_alert_functionality()
\ No newline at end of file
+    test_send_alert_functionality(login('F001', 'F001', 'faculty'))
\ No newline at end of file
@@ -3,51 +3,41 @@
 Comprehensive sentiment analysis test for the chat system.
 """
 
-import requests
 import json
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
 
-def test_sentiment_analysis():
+from http_client import login
+
+# Chat messages shared with the other test scripts
+MESSAGES = json.loads((pathlib.Path(__file__).parent / 'tests' / 'fixtures' / 'messages.json')
+                      .read_text(encoding='utf-8'))
+
+def test_sentiment_analysis(student_session):
     """Test sentiment analysis with different types of messages"""
     base_url = "http://localhost:5000"
     
-    # Create session
-    session = requests.Session()
-    
     print("=== Comprehensive Sentiment Analysis Test ===")
     
-    # Login
-    login_data = {
-        'username': 'S001',
-        'password': 'S001',
-        'role': 'student'
-    }
-    
-    login_response = session.post(f"{base_url}/login", data=login_data)
-    if login_response.status_code != 200:
-        print("Login failed!")
-        return False
-    
-    print("✅ Login successful!")
-    
     # Test cases
     test_cases = [
         {
-            'message': 'I am feeling great today! My studies are going well and I am excited about my future.',
+            'message': MESSAGES['positive_day'],
             'expected_sentiment': 'positive',
             'description': 'Positive message'
         },
         {
-            'message': 'I am feeling really stressed about my exams and I can\'t cope with the pressure.',
+            'message': MESSAGES['exam_stress'],
             'expected_sentiment': 'negative',
             'description': 'Stress/academic pressure message'
         },
         {
-            'message': 'Hello, I need help with my studies.',
+            'message': MESSAGES['help_request'],
             'expected_sentiment': 'neutral',
             'description': 'Neutral/help-seeking message'
         },
         {
-            'message': 'I feel sad and lonely, I don\'t have any friends.',
+            'message': MESSAGES['lonely'],
             'expected_sentiment': 'negative',
             'description': 'Emotional distress message'
         }
@@ -55,17 +45,22 @@ def test_sentiment_analysis():
     
     results = []
     
-    for i, test_case in enumerate(test_cases, 1):
+    # Each case has its own chat session_id, so the messages can be sent concurrently
+    with ThreadPoolExecutor(max_workers=len(test_cases)) as executor:
+        futures = [
+            executor.submit(student_session.post, f"{base_url}/chat", json={
+                'student_id': 'S001',
+                'message': test_case['message'],
+                'session_id': f'test_session_{i}'
+            })
+            for i, test_case in enumerate(test_cases, 1)
+        ]
+    
+    for (i, test_case), future in zip(enumerate(test_cases, 1), futures):
         print(f"\n{i}. Testing {test_case['description']}...")
         print(f"   Message: {test_case['message']}")
         
-        chat_data = {
-            'student_id': 'S001',
-            'message': test_case['message'],
-            'session_id': f'test_session_{i}'
-        }
-        
-        chat_response = session.post(f"{base_url}/chat", json=chat_data)
+        chat_response = future.result()
         
         if chat_response.status_code == 200:
             try:
@@ -131,12 +126,8 @@ def test_sentiment_analysis():
         else:
             print(f"\n❌ {result['test_case']}: {result.get('error', 'Unknown error')}")
     
-    return successful_tests == total_tests
+    assert successful_tests == total_tests, f"Only {successful_tests}/{total_tests} messages were analysed"
 
 if __name__ == "__main__":
-    success = test_sentiment_analysis()
-    
-    if success:
-        print(f"\n🎉 All sentiment analysis tests passed!")
-    else:
-        print(f"\n⚠️  Some tests failed. Check the details above.")
\ No newline at end of file
+    test_sentiment_analysis(login('S001', 'S001', 'student'))
+    print(f"\n🎉 All sentiment analysis tests passed!")
\ No newline at end of file
@@ -1,16 +1,14 @@
+import json
+import pathlib
+
 from services.sentiment_analysis import sentiment_analyzer
 
-# Test the sentiment analysis fix directly
-test_cases = [
-    "Hello, I need help with my studies",  # Should be general help, not crisis
-    "I feel hopeless and depressed",  # Should be crisis
-    "I'm struggling with homework",  # Should be academic stress
-    "I need help with math",  # Should be academic stress
-    "I'm feeling sad",  # Should be medium risk
-    "Everything is great!",  # Should be positive
-    "Help me understand this concept",  # Should be academic
-    "I can't cope anymore",  # Should be high risk
-]
+# Chat messages shared with the other test scripts
+MESSAGES = json.loads((pathlib.Path(__file__).parent / 'tests' / 'fixtures' / 'messages.json')
+                      .read_text(encoding='utf-8'))
+
+# Test the sentiment analysis fix directly, keyed by the outcome each case should produce
+test_cases = list(MESSAGES['keyword_probes'].values())
 
 print("Testing sentiment analysis keyword matching fix...")
 print("=" * 60)
@@ -1,63 +1,69 @@
-import requests
 import json
-import time
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+
+from http_client import login
+
+# Chat messages shared with the other test scripts
+MESSAGES = json.loads((pathlib.Path(__file__).parent / 'tests' / 'fixtures' / 'messages.json')
+                      .read_text(encoding='utf-8'))
 
 # Test the sentiment analysis fix
 base_url = "http://localhost:5000"
 
-# Test cases
-test_cases = [
-    "Hello, I need help with my studies",  # Should be general help, not crisis
-    "I feel hopeless and depressed",  # Should be crisis
-    "I'm struggling with homework",  # Should be academic stress
-    "I need help with math",  # Should be academic stress
-    "I'm feeling sad",  # Should be medium risk
-    "Everything is great!",  # Should be positive
-    "Help me understand this concept",  # Should be academic
-    "I can't cope anymore",  # Should be high risk
-]
-
-print("Testing sentiment analysis keyword matching fix...")
-print("=" * 60)
-
-for test_text in test_cases:
-    print(f"\nTesting: \"{test_text}\"")
-    
-    # Send chat message
-    chat_data = {
-        'student_id': 'S001',
-        'message': test_text
-    }
+# Test cases, keyed by the outcome each one should produce
+test_cases = list(MESSAGES['keyword_probes'].values())
+
+def test_sentiment_fix(student_session):
+    print("Testing sentiment analysis keyword matching fix...")
+    print("=" * 60)
+
+    # The probes are independent, so send them all at once over the signed-in session
+    with ThreadPoolExecutor(max_workers=len(test_cases)) as executor:
+        futures = [
+            executor.submit(student_session.post, f"{base_url}/chat",
+                            json={'student_id': 'S001', 'message': test_text})
+            for test_text in test_cases
+        ]
+
+    failed = []
+    for test_text, future in zip(test_cases, futures):
+        print(f"\nTesting: \"{test_text}\"")
     
-    try:
-        response = requests.post(f"{base_url}/chat", data=chat_data)
-        if response.status_code == 200:
-            result = response.json()
-            sentiment = result.get('sentiment_analysis', {})
-            risk_level = sentiment.get('risk_level', 'unknown')
-            detected_keywords = sentiment.get('emotion_analysis', {}).get('detected_keywords', [])
+        try:
+            response = future.result()
+            if response.status_code == 200:
+                result = response.json()
+                sentiment = result.get('sentiment_analysis', {})
+                risk_level = sentiment.get('risk_level', 'unknown')
+                detected_keywords = sentiment.get('emotion_analysis', {}).get('detected_keywords', [])
             
-            print(f"  Risk Level: {risk_level}")
-            if detected_keywords:
-                print(f"  Detected Keywords: {detected_keywords}")
-            else:
-                print(f"  No crisis keywords detected")
+                print(f"  Risk Level: {risk_level}")
+                if detected_keywords:
+                    print(f"  Detected Keywords: {detected_keywords}")
+                else:
+                    print(f"  No crisis keywords detected")
             
-            # Check if response indicates crisis when it shouldn't
-            bot_response = result.get('response', '')
-            if 'crisis' in bot_response.lower() and '988' in bot_response:
-                if risk_level == 'low' and not any(kw[0] == 'high_risk' for kw in detected_keywords):
-                    print(f"  ⚠️  WARNING: Crisis response triggered incorrectly!")
+                # Check if response indicates crisis when it shouldn't
+                bot_response = result.get('response', '')
+                if 'crisis' in bot_response.lower() and '988' in bot_response:
+                    if risk_level == 'low' and not any(kw[0] == 'high_risk' for kw in detected_keywords):
+                        print(f"  ⚠️  WARNING: Crisis response triggered incorrectly!")
+                        failed.append(test_text)
+                    else:
+                        print(f"  ✅ Crisis response appropriate")
                 else:
-                    print(f"  ✅ Crisis response appropriate")
+                    print(f"  ✅ No inappropriate crisis response")
             else:
-                print(f"  ✅ No inappropriate crisis response")
-        else:
-            print(f"  ❌ Failed: {response.status_code}")
-    except Exception as e:
-        print(f"  ❌ Error: {e}")
-    
-    time.sleep(0.5)  # Small delay between tests
+                print(f"  ❌ Failed: {response.status_code}")
+                failed.append(test_text)
+        except Exception as e:
+            print(f"  ❌ Error: {e}")
+            failed.append(test_text)
+
+    print("\n" + "=" * 60)
+    print("Test completed!")
+    assert not failed, f"{len(failed)} of {len(test_cases)} probes failed: {failed}"
 
-print("\n" + "=" * 60)
-print("Test completed!")
\ No newline at end of file
+if __name__ == "__main__":
+    test_sentiment_fix(login('S001', 'S001', 'student'))
\ No newline at end of file
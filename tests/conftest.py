@@ -0,0 +1,10 @@
+"""
+Pytest fixtures for the offline checks under tests/
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def server():
+    """These checks run the scripts in-process, so they don't need the app to be serving"""
@@ -0,0 +1,21 @@
+"""
+Check find_at_risk_students.py against the baseline script's output
+"""
+
+import pathlib
+
+from find_at_risk_students import find_at_risk_students
+
+# At-risk IDs in the order the baseline script lists them for data/sample_students.csv;
+# S025 and S002 share 45% attendance, so this also pins the tie order
+BASELINE_AT_RISK_ORDER = [
+    'S017', 'S006', 'S027', 'S021', 'S011', 'S025', 'S002', 'S015', 'S030',
+    'S009', 'S019', 'S004', 'S023', 'S013', 'S029', 'S008', 'S020',
+]
+
+
+def test_at_risk_order_matches_baseline(monkeypatch):
+    # The script reads its data file relative to the repository root
+    monkeypatch.chdir(pathlib.Path(__file__).resolve().parent.parent)
+    at_risk_students = find_at_risk_students()
+    assert at_risk_students['StudentID'].tolist() == BASELINE_AT_RISK_ORDER